@@ -0,0 +1,175 @@
+"""
+Admission control for KidLearn API
+
+Without it, every request under a spike is accepted and then queues on
+the database pool until clients time out. The middleware gives each class
+of route its own concurrency limit and a short, bounded wait queue:
+
+- auth: login/register (bcrypt is CPU-bound, so this limit is small)
+- write: other POST/PUT/PATCH/DELETE under /api
+- read: everything else under /api
+
+A request that finds the queue full, or is still queued after the
+deadline, is rejected right away with 503 and Retry-After. Health checks,
+metrics and long-lived event streams are never limited.
+
+Limits come from ADMISSION_<CLASS>_LIMIT, queue sizes from
+ADMISSION_<CLASS>_QUEUE, and the deadline from ADMISSION_QUEUE_TIMEOUT.
+Counters are exposed at GET /metrics/admission.
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Optional
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+AUTH_PATHS = {"/api/v1/auth/login", "/api/v1/auth/register"}
+
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+DEFAULT_LIMITS = {
+    # class: (concurrent requests, queued requests)
+    "read": (64, 128),
+    "write": (16, 32),
+    "auth": (4, 16),
+}
+
+
+class Limiter:
+    """Concurrency limit with a bounded FIFO wait queue"""
+
+    def __init__(self, limit: int, max_queue: int, timeout: float = QUEUE_TIMEOUT):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.shed = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot; False means the request should be shed"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Handed a slot just as the deadline hit; use it
+                self.admitted += 1
+                return True
+            self._waiters.remove(waiter)
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        if self._waiters:
+            # Hand the slot straight to the oldest waiter; in_flight is unchanged
+            self._waiters.popleft().set_result(None)
+        else:
+            self.in_flight -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "inFlight": self.in_flight,
+            "queueDepth": self.queue_depth,
+            "maxQueueDepth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+def _env_limits(route_class: str) -> tuple:
+    limit, queue = DEFAULT_LIMITS[route_class]
+    prefix = f"ADMISSION_{route_class.upper()}"
+    return int(os.getenv(f"{prefix}_LIMIT", limit)), int(os.getenv(f"{prefix}_QUEUE", queue))
+
+
+class AdmissionController:
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.limiters = {name: Limiter(*_env_limits(name)) for name in DEFAULT_LIMITS}
+
+    @staticmethod
+    def classify(method: str, path: str) -> Optional[str]:
+        if not path.startswith("/api/"):
+            return None
+        if path.endswith("/events"):
+            # Server-Sent Events hold a connection for minutes, not a DB slot
+            return None
+        if path in AUTH_PATHS:
+            return "auth"
+        return "write" if method in WRITE_METHODS else "read"
+
+    def snapshot(self) -> dict:
+        return {name: limiter.snapshot() for name, limiter in self.limiters.items()}
+
+
+admission = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying `admission` to HTTP requests"""
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route_class = None
+        if scope["type"] == "http":
+            route_class = self.controller.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.limiters[route_class]
+        if not await limiter.acquire():
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
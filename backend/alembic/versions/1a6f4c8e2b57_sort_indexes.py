@@ -0,0 +1,38 @@
+"""Sort indexes
+
+Revision ID: 1a6f4c8e2b57
+Revises: e7f25b9a0d13
+Create Date: 2026-10-19 16:05:33.912470
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a6f4c8e2b57'
+down_revision: Union[str, Sequence[str], None] = 'e7f25b9a0d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_materials_created_id', 'materials', ['created_at', 'id'], unique=False)
+    op.create_index('ix_materials_downloads_id', 'materials', ['downloads', 'id'], unique=False)
+    op.create_index('ix_materials_likes_id', 'materials', ['likes', 'id'], unique=False)
+    op.create_index('ix_materials_grade_created_id', 'materials', ['grade_level', 'created_at', 'id'], unique=False)
+    op.create_index('ix_materials_grade_downloads_id', 'materials', ['grade_level', 'downloads', 'id'], unique=False)
+    op.create_index('ix_materials_grade_likes_id', 'materials', ['grade_level', 'likes', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_materials_grade_likes_id', table_name='materials')
+    op.drop_index('ix_materials_grade_downloads_id', table_name='materials')
+    op.drop_index('ix_materials_grade_created_id', table_name='materials')
+    op.drop_index('ix_materials_likes_id', table_name='materials')
+    op.drop_index('ix_materials_downloads_id', table_name='materials')
+    op.drop_index('ix_materials_created_id', table_name='materials')
@@ -0,0 +1,58 @@
+"""Material events and rollups
+
+Revision ID: 5b8e1f0c2a47
+Revises: 2dc36abb93d9
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1f0c2a47'
+down_revision: Union[str, Sequence[str], None] = '2dc36abb93d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('material_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('material_id', sa.String(), nullable=False),
+    sa.Column('grade_level', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_material_events_created_at'), 'material_events', ['created_at'], unique=False)
+    op.create_table('material_event_rollups',
+    sa.Column('granularity', sa.String(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('material_id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('grade_level', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'material_id', 'event_type')
+    )
+    op.create_index('ix_material_event_rollups_material', 'material_event_rollups', ['material_id', 'granularity', 'bucket_start'], unique=False)
+    op.create_index('ix_material_event_rollups_grade', 'material_event_rollups', ['granularity', 'grade_level', 'bucket_start'], unique=False)
+    op.create_table('job_state',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_state')
+    op.drop_index('ix_material_event_rollups_grade', table_name='material_event_rollups')
+    op.drop_index('ix_material_event_rollups_material', table_name='material_event_rollups')
+    op.drop_table('material_event_rollups')
+    op.drop_index(op.f('ix_material_events_created_at'), table_name='material_events')
+    op.drop_table('material_events')
@@ -0,0 +1,37 @@
+"""Trending score
+
+Revision ID: 9c3d7a21e6f4
+Revises: 5b8e1f0c2a47
+Create Date: 2026-10-19 11:02:13.507339
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3d7a21e6f4'
+down_revision: Union[str, Sequence[str], None] = '5b8e1f0c2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('materials', sa.Column('trending_score', sa.Float(), nullable=False, server_default='0'))
+    op.create_index(op.f('ix_materials_trending_score'), 'materials', ['trending_score'], unique=False)
+    op.create_index('ix_materials_grade_trending', 'materials', ['grade_level', 'trending_score'], unique=False)
+    # Watermarks now also hold epoch seconds and large event ids
+    with op.batch_alter_table('job_state') as batch_op:
+        batch_op.alter_column('value', existing_type=sa.Integer(), type_=sa.BigInteger())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('job_state') as batch_op:
+        batch_op.alter_column('value', existing_type=sa.BigInteger(), type_=sa.Integer())
+    op.drop_index('ix_materials_grade_trending', table_name='materials')
+    op.drop_index(op.f('ix_materials_trending_score'), table_name='materials')
+    op.drop_column('materials', 'trending_score')
@@ -0,0 +1,53 @@
+"""Material change sequence
+
+Revision ID: b5d29e7c4f18
+Revises: 8e4c1b7d5a30
+Create Date: 2026-10-19 22:06:51.338210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d29e7c4f18'
+down_revision: Union[str, Sequence[str], None] = '8e4c1b7d5a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    last = bind.execute(
+        sa.text("SELECT value FROM job_state WHERE name = 'material_change_seq'")
+    ).scalar() or 0
+
+    op.create_table('material_change_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    # Continue numbering where the job_state counter stopped
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"CREATE SEQUENCE material_change_seq START WITH {last + 1}")
+    elif last:
+        op.execute(f"INSERT INTO material_change_log (id) VALUES ({last})")
+    op.execute("DELETE FROM job_state WHERE name = 'material_change_seq'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        last = bind.execute(sa.text("SELECT last_value FROM material_change_seq")).scalar()
+        op.execute("DROP SEQUENCE material_change_seq")
+    else:
+        last = bind.execute(sa.text("SELECT MAX(id) FROM material_change_log")).scalar()
+    op.execute(
+        "INSERT INTO job_state (name, value, updated_at) "
+        f"VALUES ('material_change_seq', {last or 0}, CURRENT_TIMESTAMP)"
+    )
+    op.drop_table('material_change_log')
@@ -0,0 +1,36 @@
+"""Material neighbors
+
+Revision ID: c41a8e5d3b92
+Revises: 9c3d7a21e6f4
+Create Date: 2026-10-19 13:40:51.283916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a8e5d3b92'
+down_revision: Union[str, Sequence[str], None] = '9c3d7a21e6f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('material_neighbors',
+    sa.Column('material_id', sa.String(), nullable=False),
+    sa.Column('neighbor_id', sa.String(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('material_id', 'neighbor_id')
+    )
+    op.create_index('ix_material_neighbors_rank', 'material_neighbors', ['material_id', 'rank'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_material_neighbors_rank', table_name='material_neighbors')
+    op.drop_table('material_neighbors')
@@ -0,0 +1,38 @@
+"""Trim sort indexes
+
+Revision ID: c7e3a9f15d62
+Revises: b5d29e7c4f18
+Create Date: 2026-10-19 22:41:18.604392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e3a9f15d62'
+down_revision: Union[str, Sequence[str], None] = 'b5d29e7c4f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every download and like rewrites these; the unfiltered downloads/likes
+    # sorts keep their (downloads, id) and (likes, id) indexes, the per-grade
+    # ones sort the grade's rows instead
+    op.drop_index('ix_materials_grade_likes_id', table_name='materials')
+    op.drop_index('ix_materials_grade_downloads_id', table_name='materials')
+    # The title keyset sort orders by (title, id)
+    op.create_index('ix_materials_title_id', 'materials', ['title', 'id'], unique=False)
+    op.drop_index(op.f('ix_materials_title'), table_name='materials')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_materials_title'), 'materials', ['title'], unique=False)
+    op.drop_index('ix_materials_title_id', table_name='materials')
+    op.create_index('ix_materials_grade_downloads_id', 'materials', ['grade_level', 'downloads', 'id'], unique=False)
+    op.create_index('ix_materials_grade_likes_id', 'materials', ['grade_level', 'likes', 'id'], unique=False)
@@ -0,0 +1,43 @@
+"""Author stats
+
+Revision ID: e7f25b9a0d13
+Revises: c41a8e5d3b92
+Create Date: 2026-10-19 15:21:07.640152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f25b9a0d13'
+down_revision: Union[str, Sequence[str], None] = 'c41a8e5d3b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_materials_author_created', 'materials', ['author_id', 'created_at'], unique=False)
+    op.create_table('author_stats',
+    sa.Column('author_id', sa.String(), nullable=False),
+    sa.Column('material_count', sa.Integer(), nullable=False),
+    sa.Column('total_downloads', sa.Integer(), nullable=False),
+    sa.Column('total_likes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('author_id')
+    )
+    # Backfill from existing materials
+    op.execute(
+        "INSERT INTO author_stats (author_id, material_count, total_downloads, total_likes) "
+        "SELECT author_id, COUNT(id), COALESCE(SUM(downloads), 0), COALESCE(SUM(likes), 0) "
+        "FROM materials GROUP BY author_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('author_stats')
+    op.drop_index('ix_materials_author_created', table_name='materials')
@@ -0,0 +1,55 @@
+"""Material change tracking
+
+Revision ID: f3b8d2a61c94
+Revises: 1a6f4c8e2b57
+Create Date: 2026-10-19 18:12:40.281937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2a61c94'
+down_revision: Union[str, Sequence[str], None] = '1a6f4c8e2b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('materials', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('materials', sa.Column('change_seq', sa.BigInteger(), nullable=False, server_default='0'))
+    # Backfill: existing rows get distinct sequence numbers in creation order
+    op.execute("UPDATE materials SET updated_at = created_at")
+    op.execute(
+        "UPDATE materials SET change_seq = ranked.seq "
+        "FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY created_at, id) AS seq FROM materials) AS ranked "
+        "WHERE materials.id = ranked.id"
+    )
+    op.execute(
+        "INSERT INTO job_state (name, value, updated_at) "
+        "SELECT 'material_change_seq', COUNT(*), CURRENT_TIMESTAMP FROM materials"
+    )
+    with op.batch_alter_table('materials') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_materials_change_seq_id', 'materials', ['change_seq', 'id'], unique=False)
+    op.create_table('material_tombstones',
+    sa.Column('material_id', sa.String(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('material_id')
+    )
+    op.create_index('ix_material_tombstones_change_seq', 'material_tombstones', ['change_seq', 'material_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_material_tombstones_change_seq', table_name='material_tombstones')
+    op.drop_table('material_tombstones')
+    op.drop_index('ix_materials_change_seq_id', table_name='materials')
+    op.execute("DELETE FROM job_state WHERE name = 'material_change_seq'")
+    op.drop_column('materials', 'change_seq')
+    op.drop_column('materials', 'updated_at')
@@ -0,0 +1,127 @@
+"""
+Benchmark: SQL listing path vs. the in-memory columnar catalog
+
+Seeds a throwaway SQLite database with synthetic materials, then times the
+same listing queries through `get_materials` (+ ORM -> Pydantic, like the
+router does) and through `ColumnarCatalog.query`.
+
+    python -m backend.benchmarks.catalog --rows 20000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from ..db import Base
+from ..db_models import User, Material
+from ..models import MaterialType, GradeLevel, MaterialSort, Material as MaterialSchema
+from ..database import get_materials
+from ..catalog import ColumnarCatalog, load_catalog
+
+WORDS = "counting apples letters maze fractions shapes ocean space animals colors reading music".split()
+
+CASES = {
+    "all, newest": {},
+    "grade filter": {"grade_level": GradeLevel.grade2},
+    "type + grade, downloads": {
+        "material_type": MaterialType.worksheet,
+        "grade_level": GradeLevel.grade1,
+        "sort": MaterialSort.downloads,
+    },
+    "search": {"search": "ocean"},
+    "search, title, deep page": {"search": "a", "sort": MaterialSort.title, "offset": 500},
+}
+
+
+async def seed(session: AsyncSession, rows: int) -> None:
+    session.add(User(id="author", email="a@example.com", name="Author", hashed_password="x", role="educator"))
+    await session.flush()
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "id": f"m{i:08d}",
+            "title": " ".join(random.sample(WORDS, 3)).title(),
+            "description": " ".join(random.choices(WORDS, k=12)),
+            "type": random.choice(list(MaterialType)).value,
+            "grade_level": random.choice(list(GradeLevel)).value,
+            "thumbnail": "📝",
+            "is_interactive": False,
+            "author_id": "author",
+            "author_name": "Author",
+            "created_at": start + timedelta(minutes=i),
+            "downloads": random.randint(0, 5000),
+            "likes": random.randint(0, 500),
+            "tags": random.sample(WORDS, 2),
+        })
+        if len(batch) == 5000:
+            await session.execute(insert(Material), batch)
+            batch = []
+    if batch:
+        await session.execute(insert(Material), batch)
+    await session.commit()
+
+
+async def timed(fn, repeat: int) -> list:
+    await fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples: list) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"{statistics.median(ordered):8.2f} {p95:8.2f}"
+
+
+async def main(rows: int, repeat: int) -> None:
+    random.seed(42)
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with Session() as session:
+        await seed(session, rows)
+        catalog = ColumnarCatalog(enabled=True)
+        started = time.perf_counter()
+        await load_catalog(session, catalog)
+        print(f"{rows} materials, catalog loaded in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+        print(f"{'case':28} {'sql p50':>8} {'sql p95':>8} {'mem p50':>8} {'mem p95':>8}  (ms)")
+        for name, case in CASES.items():
+            async def sql():
+                session.expunge_all()
+                materials, _ = await get_materials(session, **case)
+                [MaterialSchema.model_validate(m) for m in materials]
+
+            async def memory():
+                items, _ = catalog.query(**case)
+                [MaterialSchema.model_validate(row) for row in items]
+
+            sql_samples = await timed(sql, repeat)
+            memory_samples = await timed(memory, repeat)
+            print(f"{name:28} {summarize(sql_samples)} {summarize(memory_samples)}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare SQL and in-memory catalog listing")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,197 @@
+"""
+Micro-benchmarks for backend/database.py
+
+Times the core database operations directly (no HTTP):
+- get_materials for every filter/search combination, plus each sort order
+- get_stats
+- increment_downloads, create_material and create_user
+
+It runs them against synthetic datasets of several sizes (see dataset.py)
+on SQLite and optionally PostgreSQL. Each case gets warm-up runs first. The
+report gives mean ± 95% CI, p50 and p95. It then prints a scaling curve:
+p50 at each size and the log-log slope of latency against row count.
+
+A slope near 0 means the query is index bound. Near 1 means it grows
+linearly (a scan). Above 1 it degrades super-linearly and gets flagged.
+
+    python -m backend.benchmarks.database --sizes 1000,10000,100000
+    python -m backend.benchmarks.database --database-url postgresql+asyncpg://localhost/kidlearn_bench
+
+A PostgreSQL URL must point at a scratch database: its tables are dropped
+and recreated for every size.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from ..db import Base
+from ..models import GradeLevel, MaterialSort, MaterialType, UserRole
+from ..database import create_material, create_user, get_materials, get_stats, increment_downloads
+from .dataset import generate
+
+SUPERLINEAR_SLOPE = 1.1
+# bcrypt dominates create_user; a few samples are enough
+SLOW_CASES = {"create_user": 10}
+
+Case = Callable[[AsyncSession, random.Random], Awaitable[object]]
+
+
+def listing_case(**filters) -> Case:
+    async def run(db, rng):
+        await get_materials(db, **filters)
+    return run
+
+
+def build_cases(materials: int) -> Dict[str, Case]:
+    cases: Dict[str, Case] = {}
+    for material_type, grade_level, search in itertools.product(
+        (None, MaterialType.worksheet), (None, GradeLevel.grade2), (None, "ocean")
+    ):
+        parts = [p for p in ("type" if material_type else "", "grade" if grade_level else "", "search" if search else "") if p]
+        name = "get_materials " + ("+".join(parts) or "all")
+        cases[name] = listing_case(material_type=material_type, grade_level=grade_level, search=search)
+    for sort in (MaterialSort.downloads, MaterialSort.likes, MaterialSort.title):
+        cases[f"get_materials sort={sort.value}"] = listing_case(sort=sort)
+    cases["get_materials deep page"] = listing_case(offset=materials // 2)
+
+    async def stats(db, rng):
+        await get_stats(db)
+
+    async def download(db, rng):
+        # Zipfian data: most downloads hit the popular materials
+        await increment_downloads(db, f"m{rng.randrange(materials):08d}")
+
+    async def new_material(db, rng):
+        await create_material(
+            db, "e0000000", "Educator 0", "Benchmark sheet", "Created by the benchmark",
+            MaterialType.worksheet, GradeLevel.grade1, False, ["math", "counting"],
+        )
+
+    async def new_user(db, rng):
+        await create_user(db, f"bench{rng.randrange(10**12)}@example.com", "password123", "Bench", UserRole.parent)
+
+    cases.update({
+        "get_stats": stats,
+        "increment_downloads": download,
+        "create_material": new_material,
+        "create_user": new_user,
+    })
+    return cases
+
+
+def summarize(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    stdev = statistics.stdev(ordered) if len(ordered) > 1 else 0.0
+    return {
+        "mean_ms": mean,
+        "ci95_ms": 1.96 * stdev / math.sqrt(len(ordered)),
+        "p50_ms": statistics.median(ordered),
+        "p95_ms": ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)],
+    }
+
+
+async def time_case(Session, case: Case, warmup: int, repeat: int, rng: random.Random) -> dict:
+    samples = []
+    async with Session() as db:
+        for i in range(warmup + repeat):
+            # A fresh identity map per run, like a new request
+            db.expunge_all()
+            started = time.perf_counter()
+            await case(db, rng)
+            elapsed = (time.perf_counter() - started) * 1000
+            if i >= warmup:
+                samples.append(elapsed)
+    return summarize(samples)
+
+
+async def fresh_engine(database_url: str) -> AsyncEngine:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def bench_size(database_url: str, size: int, warmup: int, repeat: int, seed: int) -> Dict[str, dict]:
+    engine = await fresh_engine(database_url)
+    await generate(engine, materials=size, educators=max(10, size // 100), parents=size // 20, seed=seed)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(seed)
+
+    results = {}
+    for name, case in build_cases(size).items():
+        results[name] = await time_case(
+            Session, case, min(warmup, 2) if name in SLOW_CASES else warmup,
+            min(repeat, SLOW_CASES.get(name, repeat)), rng,
+        )
+    await engine.dispose()
+    return results
+
+
+def scaling_slope(sizes: List[int], latencies: List[float]) -> float:
+    """Least-squares slope of log(latency) against log(rows)"""
+    if len(sizes) < 2:
+        return float("nan")
+    return float(np.polyfit(np.log(sizes), np.log(latencies), 1)[0])
+
+
+def report(backend: str, sizes: List[int], results: Dict[int, Dict[str, dict]]) -> None:
+    for size in sizes:
+        print(f"\n{backend}, {size:,} materials")
+        print(f"  {'case':36} {'mean':>9} {'± 95%':>8} {'p50':>9} {'p95':>9}  (ms)")
+        for name, s in results[size].items():
+            print(f"  {name:36} {s['mean_ms']:9.2f} {s['ci95_ms']:8.2f} {s['p50_ms']:9.2f} {s['p95_ms']:9.2f}")
+
+    print(f"\n{backend}, p50 (ms) by size")
+    print(f"  {'case':36} " + " ".join(f"{size:>10,}" for size in sizes) + f" {'slope':>7}")
+    for name in results[sizes[0]]:
+        curve = [results[size][name]["p50_ms"] for size in sizes]
+        slope = scaling_slope(sizes, curve)
+        flag = "  super-linear" if slope > SUPERLINEAR_SLOPE else ""
+        print(f"  {name:36} " + " ".join(f"{ms:10.2f}" for ms in curve) + f" {slope:7.2f}{flag}")
+
+
+async def main(args) -> None:
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    urls = args.database_url or [
+        f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    ]
+    output = {}
+    for url in urls:
+        backend = url.split("://")[0]
+        results = {}
+        for size in sizes:
+            results[size] = await bench_size(url, size, args.warmup, args.repeat, args.seed)
+        report(backend, sizes, results)
+        output[backend] = {str(size): cases for size, cases in results.items()}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark backend/database.py operations")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated material counts")
+    parser.add_argument(
+        "--database-url", action="append",
+        help="Repeatable; default is a temporary SQLite file. Tables are dropped!",
+    )
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,262 @@
+"""
+Synthetic dataset generator for benchmarks and load tests
+
+Fills an empty database with educators, parents and materials at a chosen
+scale, with skew that resembles production:
+
+- grades lean towards the early years, worksheets are the most common type
+- each material belongs to a subject and takes 2-4 of its tags, popular
+  tags first
+- a few prolific educators write most materials (Zipfian authorship)
+- downloads are Zipfian over a random popularity rank; likes are a small,
+  varying fraction of downloads
+
+Rows are generated in numpy batches and written with Core executemany
+inserts (SQLite) or COPY (PostgreSQL, asyncpg). Every account shares one
+password hash, computed once. author_stats and the change sequence are
+set afterwards, so the app sees a consistent database.
+
+    python -m backend.benchmarks.dataset --scale 1m --database-url sqlite+aiosqlite:///./bench.db --create-schema
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+import numpy as np
+from sqlalchemy import JSON, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from ..db import DATABASE_URL, Base
+from ..db_models import Material, MaterialChangeLog, User
+from ..models import GradeLevel, MaterialType
+from ..database import get_password_hash, rebuild_author_stats
+
+PASSWORD = "password123"
+
+# scale: (materials, educators, parents)
+SCALES: Dict[str, tuple] = {
+    "10k": (10_000, 200, 2_000),
+    "100k": (100_000, 1_000, 20_000),
+    "1m": (1_000_000, 5_000, 100_000),
+    "10m": (10_000_000, 20_000, 500_000),
+}
+
+GRADE_WEIGHTS = {
+    GradeLevel.kindergarten: 0.24, GradeLevel.grade1: 0.21, GradeLevel.grade2: 0.18,
+    GradeLevel.grade3: 0.15, GradeLevel.grade4: 0.12, GradeLevel.grade5: 0.10,
+}
+TYPE_WEIGHTS = {
+    MaterialType.worksheet: 0.45, MaterialType.activity_book: 0.15, MaterialType.drawing: 0.15,
+    MaterialType.puzzle: 0.15, MaterialType.game: 0.10,
+}
+THUMBNAILS = {
+    MaterialType.worksheet: "📝", MaterialType.activity_book: "📖", MaterialType.drawing: "🎨",
+    MaterialType.puzzle: "🧩", MaterialType.game: "🎮",
+}
+# subject: (weight, tags, most popular first)
+SUBJECTS = {
+    "math": (0.30, ["math", "counting", "addition", "subtraction", "shapes", "fractions", "multiplication", "time", "money"]),
+    "reading": (0.25, ["reading", "alphabet", "phonics", "sight words", "writing", "tracing", "spelling", "stories"]),
+    "science": (0.15, ["science", "animals", "plants", "weather", "space", "ocean", "human body", "experiments"]),
+    "art": (0.15, ["art", "coloring", "drawing", "crafts", "colors", "patterns", "music"]),
+    "social": (0.15, ["social studies", "community", "maps", "holidays", "feelings", "family", "seasons"]),
+}
+TITLE_PREFIXES = ["Fun with", "Learning", "Exploring", "My First", "Practice", "Discover", "All About"]
+TITLE_SUFFIXES = ["Worksheet", "Challenge", "Adventure", "Activity", "Pack", "Practice", "Game"]
+
+START = datetime(2023, 1, 1)
+SPAN_SECONDS = 2 * 365 * 24 * 3600
+MAX_DOWNLOADS = 50_000
+DOWNLOAD_ZIPF = 0.9
+AUTHOR_ZIPF = 1.1
+
+
+def zipf_weights(n: int, s: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return weights / weights.sum()
+
+
+def user_rows(prefix: str, role: str, count: int, hashed_password: str, rng: np.random.Generator) -> Iterator[dict]:
+    avatar = "👨‍🏫" if role == "educator" else "👨‍👩‍👧"
+    offsets = np.sort(rng.integers(0, SPAN_SECONDS, count))
+    for n in range(count):
+        yield {
+            "id": f"{prefix}{n:07d}",
+            "email": f"{role}{n}@example.com",
+            "name": f"{role.title()} {n}",
+            "hashed_password": hashed_password,
+            "role": role,
+            "avatar": avatar,
+            "created_at": START + timedelta(seconds=int(offsets[n])),
+        }
+
+
+def tag_pools(rng: np.random.Generator, size: int = 256) -> Dict[str, List[List[str]]]:
+    """Per subject, a pool of tag lists drawn once (2-4 tags, popular tags more often)"""
+    pools = {}
+    for subject, (_, tags) in SUBJECTS.items():
+        p = zipf_weights(len(tags), 1.0)
+        pools[subject] = [
+            [str(tag) for tag in rng.choice(tags, int(k), replace=False, p=p)]
+            for k in rng.integers(2, 5, size)
+        ]
+    return pools
+
+
+def material_batches(
+    materials: int, educators: int, batch_size: int, rng: np.random.Generator
+) -> Iterator[List[dict]]:
+    grades = [g.value for g in GRADE_WEIGHTS]
+    grade_p = np.array(list(GRADE_WEIGHTS.values()))
+    types = list(TYPE_WEIGHTS)
+    type_p = np.array(list(TYPE_WEIGHTS.values()))
+    subjects = list(SUBJECTS)
+    subject_p = np.array([weight for weight, _ in SUBJECTS.values()])
+    pools = tag_pools(rng)
+    author_p = zipf_weights(educators, AUTHOR_ZIPF)
+    # Popularity rank of every material, so downloads are Zipfian over the whole set
+    ranks = rng.permutation(materials) + 1
+    spacing = max(1, SPAN_SECONDS // materials)
+
+    for start in range(0, materials, batch_size):
+        n = min(batch_size, materials - start)
+        grade_idx = rng.choice(len(grades), n, p=grade_p)
+        type_idx = rng.choice(len(types), n, p=type_p)
+        subject_idx = rng.choice(len(subjects), n, p=subject_p)
+        pool_idx = rng.integers(0, 256, n)
+        author_idx = rng.choice(educators, n, p=author_p)
+        downloads = (MAX_DOWNLOADS / ranks[start:start + n] ** DOWNLOAD_ZIPF * rng.lognormal(0, 0.3, n)).astype(np.int64)
+        likes = rng.binomial(downloads, rng.beta(2, 30, n))
+        # Creation times increase with the row number, like real inserts
+        offsets = (start + np.arange(n)) * SPAN_SECONDS // materials + rng.integers(0, spacing, n)
+        interactive = rng.random(n) < 0.1
+
+        rows = []
+        for j in range(n):
+            i = start + j
+            material_type = types[type_idx[j]]
+            grade = grades[grade_idx[j]]
+            tags = pools[subjects[subject_idx[j]]][pool_idx[j]]
+            author = int(author_idx[j])
+            created_at = START + timedelta(seconds=int(offsets[j]))
+            rows.append({
+                "id": f"m{i:08d}",
+                "title": f"{TITLE_PREFIXES[i % len(TITLE_PREFIXES)]} {tags[-1].title()} {TITLE_SUFFIXES[i % len(TITLE_SUFFIXES)]}",
+                "description": f"A {grade} {material_type.value.replace('_', ' ')} about {', '.join(tags)}.",
+                "type": material_type.value,
+                "grade_level": grade,
+                "thumbnail": THUMBNAILS[material_type],
+                "download_url": None,
+                "is_interactive": bool(material_type == MaterialType.game or interactive[j]),
+                "author_id": f"e{author:07d}",
+                "author_name": f"Educator {author}",
+                "created_at": created_at,
+                "downloads": int(downloads[j]),
+                "likes": int(likes[j]),
+                "tags": list(tags),
+                "trending_score": 0.0,
+                "updated_at": created_at,
+                "change_seq": i + 1,
+            })
+        yield rows
+
+
+async def _copy_rows(conn, table, rows: List[dict]) -> None:
+    """COPY a batch into PostgreSQL through the asyncpg connection"""
+    driver = (await conn.get_raw_connection()).driver_connection
+    columns = list(rows[0])
+    json_columns = {c.name for c in table.columns if isinstance(c.type, JSON)}
+    records = [
+        tuple(json.dumps(row[c]) if c in json_columns else row[c] for c in columns)
+        for row in rows
+    ]
+    await driver.copy_records_to_table(table.name, records=records, columns=columns)
+
+
+async def _write(conn, table, rows: List[dict], use_copy: bool) -> None:
+    if use_copy:
+        await _copy_rows(conn, table, rows)
+    else:
+        await conn.execute(insert(table), rows)
+
+
+async def generate(
+    engine: AsyncEngine,
+    materials: int,
+    educators: int,
+    parents: int = 0,
+    seed: int = 42,
+    batch_size: int = 20_000,
+    progress: bool = False,
+) -> None:
+    """Fill an empty database (schema already created) with synthetic data"""
+    rng = np.random.default_rng(seed)
+    use_copy = engine.dialect.name == "postgresql"
+    hashed_password = get_password_hash(PASSWORD)
+    started = time.perf_counter()
+
+    async with engine.begin() as conn:
+        if (await conn.execute(select(func.count()).select_from(Material))).scalar():
+            raise SystemExit("The database already has materials; generate into an empty one")
+        if engine.dialect.name == "sqlite":
+            # Throwaway benchmark data: skip fsyncs for the bulk load
+            await conn.exec_driver_sql("PRAGMA synchronous = OFF")
+
+        for prefix, role, count in (("e", "educator", educators), ("p", "parent", parents)):
+            users = list(user_rows(prefix, role, count, hashed_password, rng))
+            for i in range(0, len(users), batch_size):
+                await _write(conn, User.__table__, users[i:i + batch_size], use_copy)
+
+        written = 0
+        for rows in material_batches(materials, educators, batch_size, rng):
+            await _write(conn, Material.__table__, rows, use_copy)
+            written += len(rows)
+            if progress:
+                rate = written / (time.perf_counter() - started)
+                print(f"\r{written:,}/{materials:,} materials ({rate:,.0f} rows/s)", end="", flush=True)
+
+        # New writes continue after the generated change_seq values
+        if engine.dialect.name == "postgresql":
+            await conn.execute(select(func.setval("material_change_seq", max(materials, 1), materials > 0)))
+        elif materials:
+            await conn.execute(insert(MaterialChangeLog).values(id=materials))
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        await rebuild_author_stats(session)
+    if progress:
+        print(f"\nDone in {time.perf_counter() - started:.1f}s")
+
+
+async def main(args) -> None:
+    materials, educators, parents = SCALES[args.scale]
+    engine = create_async_engine(args.database_url)
+    if args.create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    await generate(
+        engine,
+        materials=args.materials or materials,
+        educators=args.educators or educators,
+        parents=args.parents if args.parents is not None else parents,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        progress=True,
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic KidLearn dataset")
+    parser.add_argument("--scale", choices=list(SCALES), default="10k")
+    parser.add_argument("--materials", type=int, help="Override the scale's material count")
+    parser.add_argument("--educators", type=int, help="Override the scale's educator count")
+    parser.add_argument("--parents", type=int, help="Override the scale's parent count")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--create-schema", action="store_true", help="Create tables first (unmigrated database)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,195 @@
+"""
+In-memory columnar catalog for KidLearn API
+
+An optional engine for the materials listing that keeps the whole catalog
+in NumPy column arrays and answers filter/sort/paginate queries with
+vectorized masks instead of SQL + ORM hydration:
+
+- `type` and `grade_level` are interned to small integer codes
+- counters and timestamps are int64 columns
+- search runs as vectorized substring tests over lower-cased text columns
+- full rows are kept as plain dicts, so a page is a list of lookups
+
+Select it with CATALOG_BACKEND=memory (default: sql). It is loaded from the
+database on first use (or at startup) and updated in place on writes.
+Compare both engines with `python -m backend.benchmarks.catalog`.
+"""
+
+import json
+import os
+from typing import Optional, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import MaterialType, GradeLevel, MaterialSort
+from .db_models import Material
+
+CATALOG_BACKEND = os.getenv("CATALOG_BACKEND", "sql")
+
+TYPE_CODES = {t.value: code for code, t in enumerate(MaterialType)}
+GRADE_CODES = {g.value: code for code, g in enumerate(GradeLevel)}
+TYPE_NAMES = list(TYPE_CODES)
+GRADE_NAMES = list(GRADE_CODES)
+
+MATERIAL_COLUMNS = [column.key for column in Material.__table__.columns if column.key != "trending_score"]
+
+
+class ColumnarCatalog:
+    def __init__(self, enabled: bool = CATALOG_BACKEND == "memory"):
+        self.enabled = enabled
+        self.clear()
+
+    def clear(self) -> None:
+        self.loaded = False
+        self.rows: List[dict] = []
+        self.position: dict = {}
+        self.type_code = np.zeros(0, dtype=np.int8)
+        self.grade_code = np.zeros(0, dtype=np.int8)
+        self.downloads = np.zeros(0, dtype=np.int64)
+        self.likes = np.zeros(0, dtype=np.int64)
+        self.created = np.zeros(0, dtype="datetime64[us]")
+        self.title = np.zeros(0, dtype=str)
+        self.search_text = np.zeros(0, dtype=str)
+        # Rank of each id in sorted order, for id tie-breaks; rebuilt lazily after inserts
+        self._id_rank: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @staticmethod
+    def _search_text(row: dict) -> str:
+        # Mirrors the SQL search: title, description and serialized tags
+        return "\x00".join([
+            row["title"].lower(),
+            row["description"].lower(),
+            json.dumps(row["tags"] or []).lower(),
+        ])
+
+    def load(self, rows: Sequence[dict]) -> None:
+        self.clear()
+        self.rows = [dict(r) for r in rows]
+        self.position = {r["id"]: i for i, r in enumerate(self.rows)}
+        self.type_code = np.array([TYPE_CODES.get(r["type"], -1) for r in self.rows], dtype=np.int8)
+        self.grade_code = np.array([GRADE_CODES.get(r["grade_level"], -1) for r in self.rows], dtype=np.int8)
+        self.downloads = np.array([r["downloads"] for r in self.rows], dtype=np.int64)
+        self.likes = np.array([r["likes"] for r in self.rows], dtype=np.int64)
+        self.created = np.array([r["created_at"] for r in self.rows], dtype="datetime64[us]")
+        self.title = np.array([r["title"] for r in self.rows], dtype=str)
+        self.search_text = np.array([self._search_text(r) for r in self.rows], dtype=str)
+        self.loaded = True
+
+    # Incremental updates
+
+    def add(self, row: dict) -> None:
+        row = {key: row[key] for key in MATERIAL_COLUMNS}
+        if row["id"] in self.position:
+            return
+        self.position[row["id"]] = len(self.rows)
+        self.rows.append(row)
+        self.type_code = np.append(self.type_code, np.int8(TYPE_CODES.get(row["type"], -1)))
+        self.grade_code = np.append(self.grade_code, np.int8(GRADE_CODES.get(row["grade_level"], -1)))
+        self.downloads = np.append(self.downloads, row["downloads"])
+        self.likes = np.append(self.likes, row["likes"])
+        self.created = np.append(self.created, np.datetime64(row["created_at"], "us"))
+        self.title = np.append(self.title, row["title"])
+        self.search_text = np.append(self.search_text, self._search_text(row))
+        self._id_rank = None
+
+    def set_counter(self, material_id: str, field: str, value: int, updated_at=None) -> None:
+        i = self.position.get(material_id)
+        if i is None:
+            return
+        self.rows[i][field] = value
+        if updated_at:
+            self.rows[i]["updated_at"] = updated_at
+        getattr(self, field)[i] = value
+
+    # Queries
+
+    def _mask(
+        self,
+        material_type: Optional[MaterialType],
+        grade_level: Optional[GradeLevel],
+        search: Optional[str],
+    ) -> np.ndarray:
+        mask = np.ones(len(self.rows), dtype=bool)
+        if material_type:
+            mask &= self.type_code == TYPE_CODES[material_type.value]
+        if grade_level:
+            mask &= self.grade_code == GRADE_CODES[grade_level.value]
+        if search:
+            mask &= np.char.find(self.search_text, search.lower()) >= 0
+        return mask
+
+    def _ids_ranked(self) -> np.ndarray:
+        if self._id_rank is None:
+            order = np.argsort(np.array([r["id"] for r in self.rows], dtype=str), kind="stable")
+            self._id_rank = np.empty(len(order), dtype=np.int64)
+            self._id_rank[order] = np.arange(len(order))
+        return self._id_rank
+
+    def _order(self, matches: np.ndarray, sort: MaterialSort) -> np.ndarray:
+        id_rank = self._ids_ranked()[matches]
+        if sort == MaterialSort.title:
+            keys = (id_rank, self.title[matches])
+        elif sort == MaterialSort.downloads:
+            keys = (-id_rank, -self.downloads[matches])
+        elif sort == MaterialSort.likes:
+            keys = (-id_rank, -self.likes[matches])
+        else:
+            keys = (-id_rank, -self.created[matches].astype(np.int64))
+        # lexsort sorts by the last key first
+        return matches[np.lexsort(keys)]
+
+    def query(
+        self,
+        material_type: Optional[MaterialType] = None,
+        grade_level: Optional[GradeLevel] = None,
+        search: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        sort: MaterialSort = MaterialSort.newest,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[dict], int]:
+        matches = np.flatnonzero(self._mask(material_type, grade_level, search))
+        page = self._order(matches, sort)[offset:offset + limit]
+        if fields:
+            items = [{f: self.rows[i][f] for f in fields} for i in page]
+        else:
+            items = [self.rows[i] for i in page]
+        return items, len(matches)
+
+    def facets(
+        self,
+        material_type: Optional[MaterialType] = None,
+        grade_level: Optional[GradeLevel] = None,
+        search: Optional[str] = None,
+    ) -> Tuple[int, dict]:
+        """Same disjunctive semantics as database.get_material_facets"""
+        base = self._mask(None, None, search)
+        type_mask = self._mask(material_type, None, None)
+        grade_mask = self._mask(None, grade_level, None)
+
+        type_counts = np.bincount(self.type_code[base & grade_mask], minlength=len(TYPE_NAMES))
+        grade_counts = np.bincount(self.grade_code[base & type_mask], minlength=len(GRADE_NAMES))
+        total = int(np.count_nonzero(base & type_mask & grade_mask))
+
+        return total, {
+            "type": {TYPE_NAMES[c]: int(n) for c, n in enumerate(type_counts) if n},
+            "gradeLevel": {GRADE_NAMES[c]: int(n) for c, n in enumerate(grade_counts) if n},
+        }
+
+
+materials_catalog = ColumnarCatalog()
+
+
+async def load_catalog(db: AsyncSession, catalog: ColumnarCatalog = materials_catalog) -> None:
+    columns = [getattr(Material, c) for c in MATERIAL_COLUMNS]
+    result = await db.execute(select(*columns))
+    catalog.load(result.mappings().all())
+
+
+def material_row(material: Material) -> dict:
+    return {c: getattr(material, c) for c in MATERIAL_COLUMNS}
@@ -0,0 +1,130 @@
+"""
+Read coalescing for KidLearn API
+
+When a shared link sends a whole class to the same page, hundreds of
+identical reads arrive together. `ReadCoalescer.get(key, load)` makes them
+share work:
+
+- single-flight: while a load for `key` is running, identical requests
+  await that load instead of starting their own queries
+- a short TTL result cache (READ_CACHE_TTL seconds, 0 disables it)
+- stampede protection on expiry: the first request after an entry expires
+  refreshes it, while concurrent requests keep getting the previous value
+  for up to READ_CACHE_STALE_SECONDS instead of piling onto the database
+
+Keys are tuples whose first element is a namespace (e.g. "materials.list"),
+so writes can drop one key or a whole namespace.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional, Tuple
+
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "1"))
+READ_CACHE_STALE_SECONDS = float(os.getenv("READ_CACHE_STALE_SECONDS", "5"))
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "2048"))
+
+
+class _Entry(NamedTuple):
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Avoid "exception was never retrieved" when nobody was waiting
+    if not future.cancelled():
+        future.exception()
+
+
+class ReadCoalescer:
+    def __init__(
+        self,
+        ttl: float = READ_CACHE_TTL,
+        stale_seconds: float = READ_CACHE_STALE_SECONDS,
+        max_entries: int = READ_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.clear()
+
+    def clear(self) -> None:
+        self._entries: dict = {}
+        self._flights: dict = {}
+        # Bumped by every invalidation; loads started before it are not cached
+        self._generation = 0
+        self.stats = {"hits": 0, "stale": 0, "coalesced": 0, "loads": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, key: Tuple[Hashable, ...]) -> None:
+        self._generation += 1
+        self._entries.pop(key, None)
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        self._generation += 1
+        for key in [k for k in self._entries if k[0] == namespace]:
+            del self._entries[key]
+
+    def _store(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            # Dicts keep insertion order, so this is the least recently stored
+            del self._entries[next(iter(self._entries))]
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, now + self.ttl, now + self.ttl + self.stale_seconds)
+
+    async def get(self, key: Tuple[Hashable, ...], load: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            now = time.monotonic()
+            entry: Optional[_Entry] = self._entries.get(key)
+            if entry and now < entry.fresh_until:
+                self.stats["hits"] += 1
+                return entry.value
+
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, load)
+
+            if entry and now < entry.stale_until:
+                # Someone is already refreshing; don't wait for them
+                self.stats["stale"] += 1
+                return entry.value
+
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # The leading request went away mid-load; take over from it
+
+    async def _lead(self, key: Tuple[Hashable, ...], load: Callable[[], Awaitable[Any]]) -> Any:
+        flight = asyncio.get_running_loop().create_future()
+        flight.add_done_callback(_consume_exception)
+        self._flights[key] = flight
+        generation = self._generation
+        self.stats["loads"] += 1
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as exc:
+            flight.set_exception(exc)
+            raise
+        finally:
+            del self._flights[key]
+
+        if generation == self._generation:
+            self._store(key, value)
+        flight.set_result(value)
+        return value
+
+
+read_coalescer = ReadCoalescer()
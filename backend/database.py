@@ -1,12 +1,23 @@
-from datetime import datetime
-from typing import Optional, List, Tuple
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import takewhile
+from typing import Callable, Optional, List, Sequence, Tuple, AsyncIterator, TypeVar
 
-from sqlalchemy import select, func, or_, String
+from sqlalchemy import select, func, or_, and_, delete, insert, String
 from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 
-from .models import UserRole, MaterialType, GradeLevel, User as UserSchema, Material as MaterialSchema, UserInDB
-from .db_models import User, Material
+from .models import UserRole, MaterialType, GradeLevel, MaterialSort, User as UserSchema, Material as MaterialSchema, UserInDB
+from .db import DATABASE_URL
+from .invalidation import commit_and_invalidate
+from .db_models import (
+    User, Material, JobState, AuthorStats, MaterialTombstone, MaterialNeighbor,
+    MaterialChangeLog, material_change_seq,
+)
+from .metrics import BCRYPT_QUEUE, BCRYPT_DURATION
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -19,6 +30,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# bcrypt holds a CPU for ~100ms; run it on a few threads instead of the event loop
+_bcrypt_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BCRYPT_WORKERS", "4")), thread_name_prefix="bcrypt"
+)
+T = TypeVar("T")
+
+
+async def run_password_hashing(fn: Callable[..., T], *args) -> T:
+    """Run get_password_hash / verify_password on the bcrypt threads, timing the wait"""
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        BCRYPT_QUEUE.observe(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            BCRYPT_DURATION.observe(time.perf_counter() - started)
+
+    return await asyncio.get_running_loop().run_in_executor(_bcrypt_executor, timed)
+
+
 # Database operations
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
@@ -38,7 +71,7 @@ async def create_user(
     import uuid
     user_id = str(uuid.uuid4())
     
-    hashed_password = get_password_hash(password)
+    hashed_password = await run_password_hashing(get_password_hash, password)
     
     db_user = User(
         id=user_id,
@@ -56,16 +89,36 @@ async def create_user(
     return db_user
 
 
-async def get_materials(
-    db: AsyncSession,
+# Columns needed to render a material card in the catalog grid
+MATERIAL_CARD_FIELDS = (
+    "id",
+    "title",
+    "thumbnail",
+    "type",
+    "grade_level",
+    "is_interactive",
+    "downloads",
+    "likes",
+)
+
+
+# ORDER BY per sort mode; every mode ends on id so pages are deterministic.
+# Each is backed by an index, so LIMIT N stops after N index entries, except
+# downloads/likes within a grade, which sort that grade's rows (see db_models).
+MATERIAL_SORTS = {
+    MaterialSort.newest: (Material.created_at.desc(), Material.id.desc()),
+    MaterialSort.downloads: (Material.downloads.desc(), Material.id.desc()),
+    MaterialSort.likes: (Material.likes.desc(), Material.id.desc()),
+    MaterialSort.title: (Material.title.asc(), Material.id.asc()),
+}
+
+
+def _filter_materials(
+    query,
     material_type: Optional[MaterialType] = None,
     grade_level: Optional[GradeLevel] = None,
     search: Optional[str] = None,
-    limit: int = 50,
-    offset: int = 0,
-) -> Tuple[List[Material], int]:
-    query = select(Material)
-    
+):
     if material_type:
         query = query.where(Material.type == material_type.value)
     
@@ -87,22 +140,159 @@ async def get_materials(
             )
         )
     
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total = await db.scalar(count_query) or 0
+    return query
+
+
+async def get_materials(
+    db: AsyncSession,
+    material_type: Optional[MaterialType] = None,
+    grade_level: Optional[GradeLevel] = None,
+    search: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+    sort: MaterialSort = MaterialSort.newest,
+    include_total: bool = True,
+) -> Tuple[List[Material], Optional[int]]:
+    query = _filter_materials(select(Material), material_type, grade_level, search)
+    
+    # Get total count (callers that compute facets get it from there instead)
+    total = None
+    if include_total:
+        count_query = select(func.count()).select_from(query.subquery())
+        total = await db.scalar(count_query) or 0
     
-    # Paginate
-    query = query.offset(offset).limit(limit)
+    # Sort and paginate
+    query = query.order_by(*MATERIAL_SORTS[sort]).offset(offset).limit(limit)
     result = await db.execute(query)
     materials = result.scalars().all()
     
     return list(materials), total
 
 
+async def get_material_fields(
+    db: AsyncSession,
+    fields: Sequence[str],
+    material_type: Optional[MaterialType] = None,
+    grade_level: Optional[GradeLevel] = None,
+    search: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+    sort: MaterialSort = MaterialSort.newest,
+    include_total: bool = True,
+) -> Tuple[List[dict], Optional[int]]:
+    """Like get_materials, but only selects the given columns.
+
+    Rows come back as plain dicts, so no ORM objects are hydrated and
+    unrequested columns (description, tags, ...) never leave the database.
+    """
+    columns = [getattr(Material, field) for field in fields]
+    query = _filter_materials(select(*columns), material_type, grade_level, search)
+    
+    total = None
+    if include_total:
+        count_query = select(func.count()).select_from(query.subquery())
+        total = await db.scalar(count_query) or 0
+    
+    query = query.order_by(*MATERIAL_SORTS[sort]).offset(offset).limit(limit)
+    result = await db.execute(query)
+    rows = [dict(row) for row in result.mappings()]
+    
+    return rows, total
+
+
+async def stream_material_rows(
+    db: AsyncSession,
+    material_type: Optional[MaterialType] = None,
+    grade_level: Optional[GradeLevel] = None,
+    search: Optional[str] = None,
+    sort: MaterialSort = MaterialSort.newest,
+    batch_size: int = 500,
+) -> AsyncIterator[List[dict]]:
+    """Yield every matching material as batches of plain dict rows.
+
+    Rows are fetched `batch_size` at a time (a server-side cursor on
+    PostgreSQL), so memory stays flat however large the catalog is.
+    """
+    columns = [getattr(Material, field) for field in MaterialSchema.model_fields]
+    query = _filter_materials(select(*columns), material_type, grade_level, search)
+    query = query.order_by(*MATERIAL_SORTS[sort]).execution_options(yield_per=batch_size)
+    
+    result = await db.stream(query)
+    async for rows in result.mappings().partitions():
+        yield [dict(row) for row in rows]
+
+
+async def get_material_facets(
+    db: AsyncSession,
+    material_type: Optional[MaterialType] = None,
+    grade_level: Optional[GradeLevel] = None,
+    search: Optional[str] = None,
+) -> Tuple[int, dict]:
+    """Total plus per-type and per-grade counts from a single grouped query.
+
+    Facets are disjunctive: the type counts ignore the type filter (but honour
+    the grade filter) and vice versa, so every filter chip can show how many
+    results it would lead to. The total honours both filters.
+    """
+    query = _filter_materials(
+        select(Material.type, Material.grade_level, func.count()), search=search
+    ).group_by(Material.type, Material.grade_level)
+    
+    total = 0
+    type_counts: dict = {}
+    grade_counts: dict = {}
+    for row_type, row_grade, count in (await db.execute(query)).all():
+        type_matches = not material_type or row_type == material_type.value
+        grade_matches = not grade_level or row_grade == grade_level.value
+        if grade_matches:
+            type_counts[row_type] = type_counts.get(row_type, 0) + count
+        if type_matches:
+            grade_counts[row_grade] = grade_counts.get(row_grade, 0) + count
+        if type_matches and grade_matches:
+            total += count
+    
+    return total, {"type": type_counts, "gradeLevel": grade_counts}
+
+
 async def get_material_by_id(db: AsyncSession, material_id: str) -> Optional[Material]:
     return await db.get(Material, material_id)
 
 
+async def get_materials_by_ids(db: AsyncSession, material_ids: Sequence[str]) -> List[Material]:
+    """Fetch several materials in one `WHERE id IN (...)` query (unordered)"""
+    if not material_ids:
+        return []
+    result = await db.execute(select(Material).where(Material.id.in_(set(material_ids))))
+    return list(result.scalars().all())
+
+
+# Sequence numbers are handed out before commit. On PostgreSQL concurrent
+# writers can commit out of order, so delta sync holds back changes younger
+# than this; SQLite serializes writers.
+CHANGE_SETTLE_SECONDS = float(os.getenv(
+    "CHANGE_SETTLE_SECONDS", "5" if DATABASE_URL.startswith("postgres") else "0"
+))
+
+
+async def next_change_seq(db: AsyncSession) -> int:
+    """Claim the next material change sequence number.
+
+    Writers never wait on each other: PostgreSQL draws from a SEQUENCE,
+    SQLite from an AUTOINCREMENT table. Numbers may become visible out of
+    order; see the visibility horizon in get_material_changes.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return await db.scalar(select(material_change_seq.next_value()))
+    seq = await db.scalar(insert(MaterialChangeLog).returning(MaterialChangeLog.id))
+    await db.execute(delete(MaterialChangeLog).where(MaterialChangeLog.id < seq))
+    return seq
+
+
+async def _touch(db: AsyncSession, material: Material) -> None:
+    material.updated_at = datetime.utcnow()
+    material.change_seq = await next_change_seq(db)
+
+
 async def create_material(
     db: AsyncSession,
     author_id: str,
@@ -142,18 +332,52 @@ async def create_material(
         likes=0,
         tags=tags,
     )
+    await _touch(db, db_material)
     
     db.add(db_material)
-    await db.commit()
+    await _bump_author_stats(db, author_id, material_count=1)
+    
+    await commit_and_invalidate(db, f"created {material_id}")
     await db.refresh(db_material)
     return db_material
 
 
+AUTHOR_STATS_COLUMNS = ("material_count", "total_downloads", "total_likes")
+
+
+async def _bump_author_stats(db: AsyncSession, author_id: str, **deltas: int) -> None:
+    """Add to an author's totals in one atomic upsert (creates the row on first use)
+
+    INSERT ... ON CONFLICT (author_id) DO UPDATE SET col = author_stats.col + delta
+    """
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    stmt = dialect_insert(AuthorStats).values(
+        author_id=author_id, **{column: deltas.get(column, 0) for column in AUTHOR_STATS_COLUMNS}
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[AuthorStats.author_id],
+        set_={
+            column: getattr(AuthorStats, column) + getattr(stmt.excluded, column)
+            for column in deltas
+        },
+    ))
+
+
+def _counts_message(material: Material) -> str:
+    return f"counts {material.id} {material.downloads} {material.likes} {material.updated_at.isoformat()}"
+
+
 async def increment_downloads(db: AsyncSession, material_id: str) -> Optional[int]:
     material = await db.get(Material, material_id)
     if material:
         material.downloads += 1
-        await db.commit()
+        await _touch(db, material)
+        await _bump_author_stats(db, material.author_id, total_downloads=1)
+        await commit_and_invalidate(db, _counts_message(material))
         await db.refresh(material)
         return material.downloads
     return None
@@ -163,12 +387,88 @@ async def increment_likes(db: AsyncSession, material_id: str) -> Optional[int]:
     material = await db.get(Material, material_id)
     if material:
         material.likes += 1
-        await db.commit()
+        await _touch(db, material)
+        await _bump_author_stats(db, material.author_id, total_likes=1)
+        await commit_and_invalidate(db, _counts_message(material))
         await db.refresh(material)
         return material.likes
     return None
 
 
+async def delete_material(db: AsyncSession, material_id: str) -> bool:
+    """Delete a material, leaving a tombstone for delta sync"""
+    material = await db.get(Material, material_id)
+    if not material:
+        return False
+    
+    db.add(MaterialTombstone(
+        material_id=material_id,
+        change_seq=await next_change_seq(db),
+        deleted_at=datetime.utcnow(),
+    ))
+    await db.execute(delete(MaterialNeighbor).where(or_(
+        MaterialNeighbor.material_id == material_id,
+        MaterialNeighbor.neighbor_id == material_id,
+    )))
+    await _bump_author_stats(
+        db, material.author_id,
+        material_count=-1, total_downloads=-material.downloads, total_likes=-material.likes,
+    )
+    await db.delete(material)
+    await commit_and_invalidate(db, f"deleted {material_id}")
+    return True
+
+
+async def get_material_changes(
+    db: AsyncSession,
+    after: Tuple[int, str] = (-1, ""),
+    limit: int = 500,
+    settle_seconds: float = CHANGE_SETTLE_SECONDS,
+) -> Tuple[List[Material], List[str], Tuple[int, str], bool]:
+    """Materials written and deleted after the (change_seq, id) cursor `after`.
+
+    Both tables are read in cursor order from their (change_seq, id) indexes
+    and merged; returns (changed, deleted ids, new cursor, has_more).
+
+    The page stops at the first change younger than `settle_seconds` (the
+    visibility horizon): a smaller number claimed before it may still be
+    uncommitted, and moving the cursor past it would skip that change.
+    """
+    seq, last_id = after
+    changed = await db.execute(
+        select(Material)
+        .where(or_(Material.change_seq > seq, and_(Material.change_seq == seq, Material.id > last_id)))
+        .order_by(Material.change_seq, Material.id)
+        .limit(limit + 1)
+    )
+    deleted = await db.execute(
+        select(MaterialTombstone.change_seq, MaterialTombstone.material_id, MaterialTombstone.deleted_at)
+        .where(or_(
+            MaterialTombstone.change_seq > seq,
+            and_(MaterialTombstone.change_seq == seq, MaterialTombstone.material_id > last_id),
+        ))
+        .order_by(MaterialTombstone.change_seq, MaterialTombstone.material_id)
+        .limit(limit + 1)
+    )
+    
+    entries = sorted(
+        [((m.change_seq, m.id), m.updated_at, m) for m in changed.scalars().all()]
+        + [((row_seq, row_id), deleted_at, None) for row_seq, row_id, deleted_at in deleted.all()],
+        key=lambda entry: entry[0],
+    )
+    horizon = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    settled = list(takewhile(lambda entry: entry[1] <= horizon, entries))
+    page = settled[:limit]
+    cursor = page[-1][0] if page else after
+    
+    return (
+        [m for _, _, m in page if m is not None],
+        [key[1] for key, _, m in page if m is None],
+        cursor,
+        len(settled) > limit,
+    )
+
+
 async def get_stats(db: AsyncSession) -> dict:
     # Total materials
     total_materials = await db.scalar(select(func.count(Material.id))) or 0
@@ -192,3 +492,56 @@ async def get_stats(db: AsyncSession) -> dict:
         "total_users": total_users,
         "grade_breakdown": grade_breakdown,
     }
+
+
+async def get_author_materials(
+    db: AsyncSession, author_id: str, limit: int = 50, offset: int = 0
+) -> Tuple[List[Material], int]:
+    """An author's own materials, newest first (uses the author/created_at index)"""
+    stats = await db.get(AuthorStats, author_id)
+    total = stats.material_count if stats else 0
+    
+    result = await db.execute(
+        select(Material)
+        .where(Material.author_id == author_id)
+        .order_by(Material.created_at.desc(), Material.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return list(result.scalars().all()), total
+
+
+async def get_author_stats(db: AsyncSession, author_id: str) -> Optional[AuthorStats]:
+    return await db.get(AuthorStats, author_id)
+
+
+async def rebuild_author_stats(db: AsyncSession) -> None:
+    """Recompute every author's totals from the materials table (repair/seed)"""
+    await db.execute(delete(AuthorStats))
+    await db.execute(
+        insert(AuthorStats).from_select(
+            ["author_id", "material_count", "total_downloads", "total_likes"],
+            select(
+                Material.author_id,
+                func.count(Material.id),
+                func.coalesce(func.sum(Material.downloads), 0),
+                func.coalesce(func.sum(Material.likes), 0),
+            ).group_by(Material.author_id),
+        )
+    )
+    await db.commit()
+
+
+async def get_job_watermark(db: AsyncSession, name: str) -> int:
+    state = await db.get(JobState, name)
+    return state.value if state else 0
+
+
+async def set_job_watermark(db: AsyncSession, name: str, value: int) -> None:
+    """Stage a new watermark; committed together with the job's own writes"""
+    state = await db.get(JobState, name)
+    if state:
+        state.value = value
+        state.updated_at = datetime.utcnow()
+    else:
+        db.add(JobState(name=name, value=value, updated_at=datetime.utcnow()))
@@ -11,6 +11,8 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./kidlearn.db")
 engine = create_async_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    # Connections idle across a deploy or a DB restart are replaced, not handed out broken
+    pool_pre_ping=True,
 )
 
 # Call factory for sessions
@@ -30,3 +32,8 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting async database session"""
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Dependency for endpoints that run queries concurrently, one session each"""
+    return AsyncSessionLocal
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import String, Boolean, DateTime, ForeignKey, Integer, JSON
+from sqlalchemy import String, Boolean, DateTime, ForeignKey, Integer, JSON, Index, Float, BigInteger, Sequence
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -26,7 +26,7 @@ class Material(Base):
     __tablename__ = "materials"
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
-    title: Mapped[str] = mapped_column(String, index=True)
+    title: Mapped[str] = mapped_column(String)
     description: Mapped[str] = mapped_column(String)
     type: Mapped[str] = mapped_column(String) # Enum
     grade_level: Mapped[str] = mapped_column(String) # Enum
@@ -39,6 +39,125 @@ class Material(Base):
     downloads: Mapped[int] = mapped_column(Integer, default=0)
     likes: Mapped[int] = mapped_column(Integer, default=0)
     tags: Mapped[List[str]] = mapped_column(JSON, default=list)
+    # Time-decayed popularity, scaled to the trending epoch (see backend/trending.py)
+    trending_score: Mapped[float] = mapped_column(Float, default=0.0, index=True)
+    # Bumped on every write, including counters (see database.next_change_seq)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0)
 
     # Relationships
     author: Mapped["User"] = relationship(back_populates="materials")
+
+    __table_args__ = (
+        Index("ix_materials_grade_trending", "grade_level", "trending_score"),
+        Index("ix_materials_author_created", "author_id", "created_at"),
+        # Sort modes (see MATERIAL_SORTS). downloads/likes change on every
+        # download and like, so only the unfiltered sorts get an index
+        Index("ix_materials_created_id", "created_at", "id"),
+        Index("ix_materials_grade_created_id", "grade_level", "created_at", "id"),
+        Index("ix_materials_downloads_id", "downloads", "id"),
+        Index("ix_materials_likes_id", "likes", "id"),
+        Index("ix_materials_title_id", "title", "id"),
+        # Delta sync reads everything after a (change_seq, id) cursor
+        Index("ix_materials_change_seq_id", "change_seq", "id"),
+    )
+
+
+# Material change sequence numbers on PostgreSQL (see database.next_change_seq)
+material_change_seq = Sequence("material_change_seq", metadata=Base.metadata)
+
+
+class MaterialChangeLog(Base):
+    """Material change sequence numbers on SQLite, which has no sequences.
+
+    AUTOINCREMENT never hands out an id twice, so only the newest row is kept.
+    """
+    __tablename__ = "material_change_log"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+class MaterialTombstone(Base):
+    """Deleted material ids, so delta sync can tell clients to drop them"""
+    __tablename__ = "material_tombstones"
+
+    material_id: Mapped[str] = mapped_column(String, primary_key=True)
+    change_seq: Mapped[int] = mapped_column(BigInteger)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_material_tombstones_change_seq", "change_seq", "material_id"),
+    )
+
+
+class AuthorStats(Base):
+    """Per-author totals, kept in step with material writes"""
+    __tablename__ = "author_stats"
+
+    author_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), primary_key=True)
+    material_count: Mapped[int] = mapped_column(Integer, default=0)
+    total_downloads: Mapped[int] = mapped_column(Integer, default=0)
+    total_likes: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class MaterialEvent(Base):
+    """Append-only log of downloads and likes (pruned after rollup)"""
+    __tablename__ = "material_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # No FK to materials: keeps batched inserts cheap and lets the log outlive deletes
+    material_id: Mapped[str] = mapped_column(String)
+    grade_level: Mapped[str] = mapped_column(String)
+    event_type: Mapped[str] = mapped_column(String) # Enum
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class MaterialEventRollup(Base):
+    """Event counts per material, event type and hour/day bucket"""
+    __tablename__ = "material_event_rollups"
+
+    granularity: Mapped[str] = mapped_column(String, primary_key=True) # hour | day
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    material_id: Mapped[str] = mapped_column(String, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String, primary_key=True)
+    grade_level: Mapped[str] = mapped_column(String)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_material_event_rollups_material", "material_id", "granularity", "bucket_start"),
+        Index("ix_material_event_rollups_grade", "granularity", "grade_level", "bucket_start"),
+    )
+
+
+class JobState(Base):
+    """Watermarks for background jobs (e.g. last rolled-up event id)"""
+    __tablename__ = "job_state"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class MaterialNeighbor(Base):
+    """Precomputed top-k related materials (see backend/recommendations.py)"""
+    __tablename__ = "material_neighbors"
+
+    material_id: Mapped[str] = mapped_column(String, primary_key=True)
+    neighbor_id: Mapped[str] = mapped_column(String, primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer)
+    score: Mapped[float] = mapped_column(Float)
+
+    __table_args__ = (
+        Index("ix_material_neighbors_rank", "material_id", "rank"),
+    )
+
+
+class RateLimitBucket(Base):
+    """Token buckets shared by replicas (RATE_LIMIT_BACKEND=database)"""
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True) # <endpoint>:<ip or user id>
+    tokens: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[float] = mapped_column(Float, index=True) # unix time
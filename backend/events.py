@@ -0,0 +1,291 @@
+"""
+Material event log for KidLearn API
+
+Downloads and likes are buffered in memory and appended to `material_events`
+in batches by a background task, as soon as a batch fills up or every
+EVENT_FLUSH_SECONDS, and at shutdown. Requests never write the log themselves. A rollup job folds new events into
+hourly/daily buckets in `material_event_rollups`, which is all the analytics
+endpoints ever read. Raw events are pruned once they are rolled up and older
+than the retention window. The jobs themselves are scheduled from backend/jobs.py.
+
+Consumers track an id watermark. Ids are handed out before commit, so a
+smaller id can become visible after a larger one; consumers therefore only
+read up to the newest id older than EVENT_SETTLE_SECONDS (see `settled_horizon`).
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional, List
+
+from sqlalchemy import select, delete, func, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .models import MaterialEventType, RollupGranularity, GradeLevel
+from .db_models import MaterialEvent, MaterialEventRollup
+from .database import get_job_watermark, set_job_watermark
+
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "100"))
+EVENT_FLUSH_SECONDS = float(os.getenv("EVENT_FLUSH_SECONDS", "5"))
+EVENT_RETENTION_DAYS = int(os.getenv("EVENT_RETENTION_DAYS", "30"))
+# Longer than an event can wait in a buffer plus its insert transaction
+EVENT_SETTLE_SECONDS = float(os.getenv("EVENT_SETTLE_SECONDS", "60"))
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_JOB = "event_rollup"
+TRENDING_JOB = "trending"
+
+# Jobs that read the raw log; events are only pruned once all of them are past
+EVENT_CONSUMERS = (ROLLUP_JOB, TRENDING_JOB)
+
+
+class MaterialEventBuffer:
+    """Collects events in memory and writes them with one multi-row INSERT"""
+
+    def __init__(self, batch_size: int = EVENT_BATCH_SIZE, flush_seconds: float = EVENT_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: List[dict] = []
+        self._full = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def clear(self) -> None:
+        self._pending = []
+        self._full = asyncio.Event()
+
+    def record(self, material_id: str, grade_level: str, event_type: MaterialEventType) -> None:
+        self._pending.append({
+            "material_id": material_id,
+            "grade_level": grade_level,
+            "event_type": event_type.value,
+            "created_at": datetime.utcnow(),
+        })
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+
+    async def wait_due(self) -> None:
+        """Return once a batch is full or `flush_seconds` have passed"""
+        try:
+            await asyncio.wait_for(self._full.wait(), self.flush_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def flush(self, db: AsyncSession) -> int:
+        # Swap the list out first so events recorded while we await are kept
+        rows, self._pending = self._pending, []
+        self._full.clear()
+        if not rows:
+            return 0
+        try:
+            await db.execute(insert(MaterialEvent), rows)
+            await db.commit()
+        except Exception:
+            # Keep the batch for the next attempt
+            self._pending[:0] = rows
+            raise
+        return len(rows)
+
+
+event_buffer = MaterialEventBuffer()
+
+
+def record_material_event(material_id: str, grade_level: str, event_type: MaterialEventType) -> None:
+    """Buffer an event; a full batch wakes `flush_events_periodically`"""
+    event_buffer.record(material_id, grade_level, event_type)
+
+
+async def flush_events_periodically(
+    session_factory: async_sessionmaker, buffer: MaterialEventBuffer = event_buffer
+) -> None:
+    """Flush the buffer whenever a batch fills up, and at least every `flush_seconds`"""
+    while True:
+        await buffer.wait_due()
+        if not len(buffer):
+            continue
+        try:
+            async with session_factory() as db:
+                await buffer.flush(db)
+        except Exception:
+            logger.exception("Flushing %d buffered events failed", len(buffer))
+            # The batch is kept; back off instead of retrying on every event
+            await asyncio.sleep(buffer.flush_seconds)
+
+
+async def settled_horizon(db: AsyncSession, watermark: int, settle_seconds: float = EVENT_SETTLE_SECONDS) -> int:
+    """Highest event id a consumer at `watermark` may read without skipping a late commit.
+
+    An event is inserted at most EVENT_FLUSH_SECONDS after its created_at, and
+    any smaller id was handed out before that insert. Once created_at is older
+    than `settle_seconds`, every smaller id has therefore been committed or
+    rolled back.
+    """
+    fence = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    horizon = await db.scalar(
+        select(func.max(MaterialEvent.id)).where(
+            MaterialEvent.id > watermark,
+            MaterialEvent.created_at <= fence,
+        )
+    )
+    return horizon or watermark
+
+
+# Rollups
+
+def bucket_start(moment: datetime, granularity: RollupGranularity) -> datetime:
+    if granularity == RollupGranularity.hour:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _upsert(db: AsyncSession):
+    """Dialect-specific INSERT supporting ON CONFLICT (SQLite and PostgreSQL)"""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(MaterialEventRollup)
+
+
+async def rollup_events(
+    db: AsyncSession, batch_size: int = 10000, settle_seconds: float = EVENT_SETTLE_SECONDS
+) -> int:
+    """Fold settled events newer than the watermark into hourly and daily buckets.
+
+    Returns the number of raw events consumed. Runs in batches so a backlog
+    never has to be loaded at once; call until it returns 0 to catch up.
+    """
+    watermark = await get_job_watermark(db, ROLLUP_JOB)
+    horizon = await settled_horizon(db, watermark, settle_seconds)
+    if horizon <= watermark:
+        return 0
+    result = await db.execute(
+        select(
+            MaterialEvent.id,
+            MaterialEvent.material_id,
+            MaterialEvent.grade_level,
+            MaterialEvent.event_type,
+            MaterialEvent.created_at,
+        )
+        .where(MaterialEvent.id > watermark, MaterialEvent.id <= horizon)
+        .order_by(MaterialEvent.id)
+        .limit(batch_size)
+    )
+    events = result.all()
+    if not events:
+        return 0
+
+    counts: Counter = Counter()
+    grades = {}
+    for _, material_id, grade_level, event_type, created_at in events:
+        grades[material_id] = grade_level
+        for granularity in RollupGranularity:
+            key = (granularity.value, bucket_start(created_at, granularity), material_id, event_type)
+            counts[key] += 1
+
+    stmt = _upsert(db)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "material_id", "event_type"],
+        set_={"count": MaterialEventRollup.count + stmt.excluded.count},
+    )
+    await db.execute(stmt, [
+        {
+            "granularity": granularity,
+            "bucket_start": start,
+            "material_id": material_id,
+            "event_type": event_type,
+            "grade_level": grades[material_id],
+            "count": count,
+        }
+        for (granularity, start, material_id, event_type), count in counts.items()
+    ])
+
+    # Advance the watermark in the same transaction as the counts
+    await set_job_watermark(db, ROLLUP_JOB, events[-1][0])
+    await db.commit()
+    return len(events)
+
+
+async def prune_events(db: AsyncSession, retention_days: int = EVENT_RETENTION_DAYS) -> int:
+    """Delete raw events that every consumer has processed and are past retention"""
+    watermark = min([await get_job_watermark(db, job) for job in EVENT_CONSUMERS])
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = await db.execute(
+        delete(MaterialEvent).where(
+            MaterialEvent.id <= watermark,
+            MaterialEvent.created_at < cutoff,
+        )
+    )
+    await db.commit()
+    return result.rowcount or 0
+
+
+# Analytics reads (rollups only)
+
+def default_since(granularity: RollupGranularity) -> datetime:
+    window = timedelta(hours=48) if granularity == RollupGranularity.hour else timedelta(days=7)
+    return bucket_start(datetime.utcnow() - window, granularity)
+
+
+def _pivot(rows) -> List[dict]:
+    buckets = {}
+    for start, event_type, count in rows:
+        bucket = buckets.setdefault(start, {"bucket_start": start, "downloads": 0, "likes": 0})
+        if event_type == MaterialEventType.download.value:
+            bucket["downloads"] += count
+        elif event_type == MaterialEventType.like.value:
+            bucket["likes"] += count
+    return [buckets[start] for start in sorted(buckets)]
+
+
+async def get_material_activity(
+    db: AsyncSession,
+    material_id: str,
+    granularity: RollupGranularity,
+    since: datetime,
+) -> List[dict]:
+    result = await db.execute(
+        select(MaterialEventRollup.bucket_start, MaterialEventRollup.event_type, MaterialEventRollup.count)
+        .where(
+            MaterialEventRollup.material_id == material_id,
+            MaterialEventRollup.granularity == granularity.value,
+            MaterialEventRollup.bucket_start >= since,
+        )
+    )
+    return _pivot(result.all())
+
+
+async def get_grade_activity(
+    db: AsyncSession,
+    granularity: RollupGranularity,
+    since: datetime,
+    grade_level: Optional[GradeLevel] = None,
+) -> dict:
+    query = (
+        select(
+            MaterialEventRollup.grade_level,
+            MaterialEventRollup.bucket_start,
+            MaterialEventRollup.event_type,
+            func.sum(MaterialEventRollup.count),
+        )
+        .where(
+            MaterialEventRollup.granularity == granularity.value,
+            MaterialEventRollup.bucket_start >= since,
+        )
+        .group_by(
+            MaterialEventRollup.grade_level,
+            MaterialEventRollup.bucket_start,
+            MaterialEventRollup.event_type,
+        )
+    )
+    if grade_level:
+        query = query.where(MaterialEventRollup.grade_level == grade_level.value)
+
+    rows_by_grade = {}
+    for grade, start, event_type, count in (await db.execute(query)).all():
+        rows_by_grade.setdefault(grade, []).append((start, event_type, int(count)))
+    return {grade: _pivot(rows) for grade, rows in rows_by_grade.items()}
@@ -0,0 +1,220 @@
+"""
+Cross-instance cache invalidation for KidLearn API
+
+Every replica keeps in-process state (read cache, columnar catalog,
+autocomplete index, live counter broker). Write paths in database.py
+commit through `commit_and_invalidate`, which sends compact messages:
+
+    counts <material id> <downloads> <likes> <updated_at>
+    created <material id>
+    deleted <material id>
+
+The writing replica applies them right after its commit; the others get
+them through the bus and evict only the affected keys. A remote `created`
+fetches the one new row and adds it to the loaded indexes (the similarity
+index only in memory: the writer already stored the neighbour lists).
+
+- PostgreSQL: NOTIFY inside the write transaction (so nothing is sent for
+  a rolled-back write) and one LISTEN connection per replica
+- memory: replicas in the same process share a hub (tests, SQLite)
+
+Select with INVALIDATION_BACKEND=postgres|memory (default: postgres when
+DATABASE_URL is PostgreSQL). A replica that loses its LISTEN connection
+may have missed messages, so it drops all of its caches on reconnect.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Set
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine, async_sessionmaker
+
+from .db import DATABASE_URL, AsyncSessionLocal
+from .db_models import Material
+from .coalesce import read_coalescer
+from .catalog import materials_catalog, material_row
+from .suggest import suggest_index
+from .recommendations import related_index, load_related_index
+from .live import counter_broker
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_BACKEND = os.getenv(
+    "INVALIDATION_BACKEND", "postgres" if DATABASE_URL.startswith("postgres") else "memory"
+)
+INVALIDATION_CHANNEL = "kidlearn_invalidate"
+LISTEN_CHECK_SECONDS = 5
+RECONNECT_SECONDS = 2
+
+# handler(message, local): local is True on the replica that made the write
+Handler = Callable[[str, bool], None]
+
+# Strong references to fetches scheduled by apply_invalidation
+_pending: Set[asyncio.Task] = set()
+
+
+async def add_created_material(material_id: str, session_factory: async_sessionmaker = AsyncSessionLocal) -> None:
+    """Add a material created on another replica to this replica's indexes"""
+    async with session_factory() as db:
+        material = (await db.execute(select(Material).where(Material.id == material_id))).scalar_one_or_none()
+    if material is None:
+        # Already deleted again; its own message takes care of the indexes
+        return
+    if materials_catalog.loaded:
+        materials_catalog.add(material_row(material))
+    if suggest_index.loaded:
+        suggest_index.add(material.id, material.title, material.tags or [], material.downloads or 0)
+    row = (material.id, material.grade_level, material.title, material.description, material.tags or [])
+    if related_index.loaded:
+        related_index.add(*row)
+    else:
+        related_index.pending.append(row)
+
+
+async def reload_related_index(session_factory: async_sessionmaker = AsyncSessionLocal) -> None:
+    async with session_factory() as db:
+        await load_related_index(db)
+
+
+def _schedule(coro) -> None:
+    task = asyncio.get_running_loop().create_task(coro)
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def apply_invalidation(message: str, local: bool) -> None:
+    kind, material_id, *args = message.split(" ")
+    read_coalescer.invalidate(("materials.detail", material_id))
+    read_coalescer.invalidate(("stats",))
+
+    if kind == "counts":
+        downloads, likes, updated_at = int(args[0]), int(args[1]), datetime.fromisoformat(args[2])
+        if materials_catalog.loaded:
+            materials_catalog.set_counter(material_id, "downloads", downloads, updated_at)
+            materials_catalog.set_counter(material_id, "likes", likes, updated_at)
+        counter_broker.publish(material_id, downloads, likes)
+        return
+
+    read_coalescer.invalidate_namespace("materials.list")
+    if kind == "deleted":
+        materials_catalog.clear()
+        suggest_index.clear()
+        related_index.remove(material_id)
+    elif not local:
+        # The writer adds new rows to its own indexes; everyone else fetches just that row
+        _schedule(add_created_material(material_id))
+
+
+def drop_all_caches() -> None:
+    read_coalescer.clear()
+    materials_catalog.clear()
+    suggest_index.clear()
+    # Requests queue new materials until it is back; they never build it themselves
+    was_loaded = related_index.loaded
+    related_index.clear()
+    if was_loaded:
+        _schedule(reload_related_index())
+
+
+class InvalidationBus:
+    """In-memory backend; buses sharing a hub behave like separate replicas"""
+
+    def __init__(self, hub: Optional[list] = None, handlers: Optional[List[Handler]] = None):
+        self.origin = uuid.uuid4().hex[:8]
+        self.handlers: List[Handler] = list(handlers or [])
+        self.hub = hub if hub is not None else []
+        self.hub.append(self)
+
+    def deliver(self, messages: Iterable[str], local: bool) -> None:
+        for message in messages:
+            for handler in self.handlers:
+                handler(message, local)
+
+    async def notify(self, db: AsyncSession, messages: List[str]) -> None:
+        """Stage messages inside the write transaction (nothing to do in memory)"""
+
+    def publish_local(self, messages: List[str]) -> None:
+        """Apply committed messages here, and hand them to the other replicas"""
+        self.deliver(messages, local=True)
+        for other in self.hub:
+            if other is not self:
+                other.deliver(messages, local=False)
+
+    async def start(self, engine: AsyncEngine) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """LISTEN/NOTIFY backend (asyncpg)"""
+
+    def __init__(self, handlers: Optional[List[Handler]] = None):
+        super().__init__(hub=[], handlers=handlers)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def notify(self, db: AsyncSession, messages: List[str]) -> None:
+        # Delivered by PostgreSQL on commit, never for a rolled-back write
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": INVALIDATION_CHANNEL, "payload": "\n".join([self.origin, *messages])},
+        )
+
+    def publish_local(self, messages: List[str]) -> None:
+        self.deliver(messages, local=True)
+
+    def on_notification(self, connection, pid, channel, payload: str) -> None:
+        origin, *messages = payload.split("\n")
+        if origin != self.origin:
+            self.deliver(messages, local=False)
+
+    async def start(self, engine: AsyncEngine) -> None:
+        self._listener = asyncio.create_task(self._listen(engine))
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+
+    async def _listen(self, engine: AsyncEngine) -> None:
+        connected_before = False
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    driver = (await conn.get_raw_connection()).driver_connection
+                    await driver.add_listener(INVALIDATION_CHANNEL, self.on_notification)
+                    if connected_before:
+                        # Anything sent while we were away is lost
+                        drop_all_caches()
+                    connected_before = True
+                    try:
+                        while not driver.is_closed():
+                            await asyncio.sleep(LISTEN_CHECK_SECONDS)
+                    finally:
+                        if not driver.is_closed():
+                            await driver.remove_listener(INVALIDATION_CHANNEL, self.on_notification)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation listener lost its connection")
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+
+def create_bus(backend: str = INVALIDATION_BACKEND) -> InvalidationBus:
+    if backend == "postgres":
+        return PostgresInvalidationBus(handlers=[apply_invalidation])
+    return InvalidationBus(handlers=[apply_invalidation])
+
+
+invalidation_bus = create_bus()
+
+
+async def commit_and_invalidate(db: AsyncSession, *messages: str) -> None:
+    """Commit a write and invalidate what it touched, here and on every other replica"""
+    await invalidation_bus.notify(db, list(messages))
+    await db.commit()
+    invalidation_bus.publish_local(list(messages))
@@ -0,0 +1,61 @@
+"""
+Background jobs for KidLearn API
+
+Flushes buffered events, rolls them up, refreshes trending scores and
+applies event retention. Run it once (e.g. from cron) or keep it looping:
+
+    python -m backend.jobs
+    python -m backend.jobs --loop 300
+"""
+
+import asyncio
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .events import EVENT_SETTLE_SECONDS, event_buffer, rollup_events, prune_events
+from .trending import refresh_trending_scores
+
+
+async def _drain(job, db: AsyncSession, **kwargs) -> int:
+    total = 0
+    while True:
+        consumed = await job(db, **kwargs)
+        if not consumed:
+            return total
+        total += consumed
+
+
+async def run_jobs(db: AsyncSession, settle_seconds: float = EVENT_SETTLE_SECONDS) -> dict:
+    """Run every periodic job once and report what each one did"""
+    flushed = await event_buffer.flush(db)
+    rolled = await _drain(rollup_events, db, settle_seconds=settle_seconds)
+    trending = await _drain(refresh_trending_scores, db, settle_seconds=settle_seconds)
+    pruned = await prune_events(db)
+    
+    return {
+        "flushed": flushed,
+        "rolled_up": rolled,
+        "trending": trending,
+        "pruned": pruned,
+    }
+
+
+async def main(loop_seconds: Optional[float] = None) -> None:
+    from .db import AsyncSessionLocal
+
+    while True:
+        async with AsyncSessionLocal() as session:
+            print(await run_jobs(session))
+        if not loop_seconds:
+            return
+        await asyncio.sleep(loop_seconds)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run KidLearn background jobs")
+    parser.add_argument("--loop", type=float, default=None, help="Repeat every N seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.loop))
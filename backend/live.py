@@ -0,0 +1,86 @@
+"""
+Live counter updates for KidLearn API
+
+`increment_downloads` / `increment_likes` publish the new counts of a
+material to an in-process broker. Open detail pages subscribe through
+`GET /materials/{id}/events` (Server-Sent Events) instead of polling.
+
+Updates are coalesced: publishing only records the latest counts, and a
+single flusher pushes them out at most once every COUNTER_PUSH_SECONDS
+per material. Each message carries absolute counts, is encoded once and
+handed to every subscriber's one-slot queue, so a slow client only ever
+holds the newest update and fan-out costs one put per subscriber.
+"""
+
+import asyncio
+import json
+import os
+from typing import Optional
+
+COUNTER_PUSH_SECONDS = float(os.getenv("COUNTER_PUSH_SECONDS", "1"))
+
+
+def encode_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class CounterBroker:
+    def __init__(self, interval: float = COUNTER_PUSH_SECONDS):
+        self.interval = interval
+        self.clear()
+
+    def clear(self) -> None:
+        flusher = getattr(self, "_flusher", None)
+        if flusher and not flusher.done():
+            flusher.cancel()
+        self._subscribers: dict = {}
+        # material id -> latest counts not pushed yet
+        self._pending: dict = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def subscriber_count(self, material_id: Optional[str] = None) -> int:
+        if material_id:
+            return len(self._subscribers.get(material_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, material_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(material_id, set()).add(queue)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, material_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(material_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[material_id]
+
+    def publish(self, material_id: str, downloads: int, likes: int) -> None:
+        # Nobody watching: nothing to remember
+        if material_id in self._subscribers:
+            self._pending[material_id] = {"downloads": downloads, "likes": likes}
+
+    def flush(self) -> int:
+        """Push every pending update; returns the number of messages delivered"""
+        pending, self._pending = self._pending, {}
+        delivered = 0
+        for material_id, counts in pending.items():
+            message = encode_event("counters", {"id": material_id, **counts})
+            for queue in self._subscribers.get(material_id, ()):
+                if queue.full():
+                    # Counts are absolute, so the newest message supersedes the old one
+                    queue.get_nowait()
+                queue.put_nowait(message)
+                delivered += 1
+        return delivered
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+
+counter_broker = CounterBroker()
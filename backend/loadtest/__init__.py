@@ -0,0 +1,23 @@
+"""
+End-to-end load tests for KidLearn API
+
+Drives the app with a weighted mix of scenarios that mirror production
+traffic (see scenarios.py) from a fixed number of concurrent workers, and
+reports throughput and p50/p95/p99 latency per scenario.
+
+    # in-process (httpx ASGITransport), throwaway SQLite with 20k materials
+    python -m backend.loadtest --rows 20000 --duration 30 --concurrency 32
+
+    # same, but through a real uvicorn server on a local socket
+    python -m backend.loadtest --target uvicorn
+
+    # an already running deployment (its data is used as is)
+    python -m backend.loadtest --url http://localhost:8000 --profile browse
+
+    # keep a baseline, then compare a later run against it
+    python -m backend.loadtest --save baseline.json
+    python -m backend.loadtest --compare baseline.json
+
+Runs are reproducible: every worker draws scenarios and ids from its own
+seeded RNG (--seed).
+"""
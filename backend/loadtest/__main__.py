@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from .scenarios import PROFILES
+
+# The harness is a single client IP; per-IP rate limits would turn most of
+# a login storm into 429s. Set RATE_LIMIT_* explicitly to test them instead.
+for name in ("LOGIN", "REGISTER", "LIKE", "DOWNLOAD"):
+    os.environ.setdefault(f"RATE_LIMIT_{name}", "1000000/1")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the KidLearn API")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--url", help="Load test a running server instead (no seeding)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mix")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds")
+    parser.add_argument("--rows", type=int, default=5000, help="Materials to seed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", metavar="PATH", help="Write the report as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=20,
+        help="p95 increase (%%) over the baseline that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    # After the environment is set: backend.db reads it on import
+    from .runner import run, format_report, save_baseline, compare
+
+    report = asyncio.run(run(
+        target=args.target,
+        url=args.url,
+        profile=args.profile,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        rows=args.rows,
+        seed=args.seed,
+    ))
+    meta = report["meta"]
+    print(f"{meta['target']}, profile {meta['profile']}, {meta['concurrency']} workers, {meta['duration']}s\n")
+    print(format_report(report))
+
+    if args.save:
+        save_baseline(report, args.save)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        text, regressed = compare(report, baseline, args.tolerance)
+        print(f"\nAgainst {args.compare} ({baseline['meta']['started_at']}):\n{text}")
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
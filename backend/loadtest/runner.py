@@ -0,0 +1,219 @@
+"""
+Load test runner: targets, closed-loop workers, reports and baselines
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+from .scenarios import PROFILES, SCENARIOS, prepare
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+    }
+
+
+async def seed_database(database_url: str, rows: int, seed: int) -> None:
+    """Create the schema and a synthetic dataset in a throwaway database"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from ..db import Base
+    from ..benchmarks.dataset import generate
+
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await generate(engine, materials=rows, educators=max(10, rows // 100), seed=seed)
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def in_process_client(concurrency: int):
+    # Imported late: DATABASE_URL must be set before backend.db creates its engine
+    from ..main import app
+    from ..warmup import readiness
+
+    # ASGITransport skips the lifespan, so there is no warm-up to wait for
+    readiness.ready = True
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30) as client:
+        yield client
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(concurrency: int, startup_timeout: float = 60):
+    """Start `uvicorn backend.main:app` on a local port and talk to it over TCP"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT,
+        env=os.environ.copy(),
+    )
+    try:
+        async with remote_client(f"http://127.0.0.1:{port}", concurrency) as client:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("uvicorn did not become ready")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+@asynccontextmanager
+async def remote_client(url: str, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        yield client
+
+
+async def worker(client, ctx, weights: Dict[str, int], rng: random.Random, deadline: float, results: dict) -> None:
+    names = list(weights)
+    counts = [weights[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights=counts)[0]
+        started = time.perf_counter()
+        try:
+            response = await SCENARIOS[name](client, ctx, rng)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        latencies, errors = results[name]
+        latencies.append((time.perf_counter() - started) * 1000)
+        if failed:
+            errors[0] += 1
+
+
+async def run_load(client, profile: str, concurrency: int, duration: float, seed: int) -> dict:
+    weights = PROFILES[profile]
+    ctx = await prepare(client)
+    results = {name: ([], [0]) for name in weights}
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        worker(client, ctx, weights, random.Random(seed * 1000 + i), deadline, results)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    scenarios = {
+        name: summarize(latencies, errors[0], elapsed)
+        for name, (latencies, errors) in results.items()
+    }
+    all_latencies = [ms for latencies, _ in results.values() for ms in latencies]
+    total_errors = sum(errors[0] for _, errors in results.values())
+    return {"scenarios": scenarios, "total": summarize(all_latencies, total_errors, elapsed)}
+
+
+async def run(
+    target: str = "inprocess",
+    url: Optional[str] = None,
+    profile: str = "mix",
+    concurrency: int = 16,
+    duration: float = 10,
+    rows: int = 5000,
+    seed: int = 42,
+) -> dict:
+    if url:
+        target = "remote"
+        client_cm = remote_client(url, concurrency)
+    else:
+        database_url = os.environ.setdefault(
+            "DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+        )
+        await seed_database(database_url, rows, seed)
+        client_cm = (uvicorn_client if target == "uvicorn" else in_process_client)(concurrency)
+
+    async with client_cm as client:
+        report = await run_load(client, profile, concurrency, duration, seed)
+
+    report["meta"] = {
+        "target": url or target,
+        "profile": profile,
+        "concurrency": concurrency,
+        "duration": duration,
+        "rows": None if url else rows,
+        "seed": seed,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'scenario':18} {'requests':>9} {'errors':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)"]
+    rows = {**report["scenarios"], "total": report["total"]}
+    for name, s in rows.items():
+        lines.append(
+            f"{name:18} {s['requests']:9d} {s['errors']:7d} {s['rps']:8.1f} "
+            f"{s['p50_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def save_baseline(report: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> tuple:
+    """Per-scenario changes vs. a baseline; returns (text, regressed scenario names)"""
+    lines = [f"{'scenario':18} {'rps':>16} {'p95 (ms)':>20}"]
+    regressed = []
+    rows = {**report["scenarios"], "total": report["total"]}
+    old_rows = {**baseline["scenarios"], "total": baseline["total"]}
+    for name, new in rows.items():
+        old = old_rows.get(name)
+        if not old or not old["requests"]:
+            lines.append(f"{name:18} {'(new)':>16}")
+            continue
+        rps_change = (new["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0.0
+        p95_change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        if p95_change > tolerance:
+            regressed.append(name)
+        lines.append(
+            f"{name:18} {new['rps']:8.1f} ({rps_change:+5.1f}%) {new['p95_ms']:10.2f} ({p95_change:+5.1f}%)"
+            + ("  REGRESSED" if name in regressed else "")
+        )
+    return "\n".join(lines), regressed
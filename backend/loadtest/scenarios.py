@@ -0,0 +1,125 @@
+"""
+Load test scenarios
+
+Each scenario issues one request through an httpx client and returns the
+response. Profiles weight scenarios to match a traffic pattern; "mix" is
+the everyday blend of a catalog site (mostly reads, a trickle of writes).
+"""
+
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from ..models import GradeLevel, MaterialType
+
+API = "/api/v1"
+PASSWORD = "loadtest-password"
+EDUCATOR_EMAIL = "loadtest-educator@example.com"
+PARENT_EMAIL = "loadtest-parent@example.com"
+SEARCH_TERMS = ["counting", "letters", "fractions", "ocean", "space", "animals", "colors", "a"]
+# Downloads cluster on a few materials (a link shared with a whole class)
+HOT_MATERIALS = 5
+
+
+@dataclass
+class LoadContext:
+    """What scenarios need to know about the target: ids and credentials"""
+    material_ids: List[str]
+    educator_headers: Dict[str, str] = field(default_factory=dict)
+    parent_headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def hot_ids(self) -> List[str]:
+        return self.material_ids[:HOT_MATERIALS]
+
+
+Scenario = Callable[[httpx.AsyncClient, LoadContext, random.Random], Awaitable[httpx.Response]]
+
+
+async def browse_by_grade(client, ctx, rng):
+    grade = rng.choice(list(GradeLevel)).value
+    return await client.get(
+        f"{API}/materials", params={"gradeLevel": grade, "limit": 20, "fields": "card"}
+    )
+
+
+async def search(client, ctx, rng):
+    return await client.get(
+        f"{API}/materials", params={"search": rng.choice(SEARCH_TERMS), "limit": 20}
+    )
+
+
+async def detail(client, ctx, rng):
+    return await client.get(f"{API}/materials/{rng.choice(ctx.material_ids)}")
+
+
+async def download(client, ctx, rng):
+    return await client.post(f"{API}/materials/{rng.choice(ctx.hot_ids)}/download")
+
+
+async def login(client, ctx, rng):
+    return await client.post(
+        f"{API}/auth/login", json={"email": PARENT_EMAIL, "password": PASSWORD}
+    )
+
+
+async def upload(client, ctx, rng):
+    return await client.post(
+        f"{API}/materials",
+        headers=ctx.educator_headers,
+        data={
+            "title": f"Load test sheet {rng.randrange(10**9)}",
+            "description": "Generated by the load test harness",
+            "type": rng.choice(list(MaterialType)).value,
+            "grade_level": rng.choice(list(GradeLevel)).value,
+            "tags": json.dumps(rng.sample(SEARCH_TERMS, 2)),
+        },
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "browse_by_grade": browse_by_grade,
+    "search": search,
+    "detail": detail,
+    "download": download,
+    "login": login,
+    "upload": upload,
+}
+
+PROFILES: Dict[str, Dict[str, int]] = {
+    "mix": {"browse_by_grade": 35, "search": 20, "detail": 30, "download": 10, "login": 4, "upload": 1},
+    "browse": {"browse_by_grade": 60, "search": 40},
+    "download-burst": {"download": 1},
+    "login-storm": {"login": 1},
+    # One profile per scenario, for isolating a single endpoint
+    **{name: {name: 1} for name in SCENARIOS},
+}
+
+
+async def prepare(client: httpx.AsyncClient, id_sample: int = 200) -> LoadContext:
+    """Collect material ids and sign in the load test accounts (registering them if needed)"""
+    response = await client.get(
+        f"{API}/materials", params={"fields": "id", "limit": 100, "sort": "downloads"}
+    )
+    response.raise_for_status()
+    material_ids = [item["id"] for item in response.json()["items"]]
+    if not material_ids:
+        raise SystemExit("The target has no materials to load test against")
+
+    ctx = LoadContext(material_ids=material_ids[:id_sample])
+    for email, role, attr in (
+        (EDUCATOR_EMAIL, "educator", "educator_headers"),
+        (PARENT_EMAIL, "parent", "parent_headers"),
+    ):
+        response = await client.post(
+            f"{API}/auth/register",
+            json={"email": email, "password": PASSWORD, "name": f"Load test {role}", "role": role},
+        )
+        if response.status_code == 400:
+            response = await client.post(f"{API}/auth/login", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        setattr(ctx, attr, {"Authorization": f"Bearer {response.json()['access_token']}"})
+    return ctx
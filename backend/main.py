@@ -3,12 +3,39 @@ KidLearn API - FastAPI Backend
 Educational platform for kids from Kindergarten to Grade 5
 """
 
+import asyncio
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from .routers import auth, materials, stats, users
+from .routers import auth, materials, stats, users, analytics, home
+from .db import AsyncSessionLocal, engine
+from .invalidation import invalidation_bus
+from .events import event_buffer, flush_events_periodically
+from .warmup import readiness, warm_up
+from .admission import AdmissionMiddleware, admission
+from .metrics import MetricsMiddleware, render_metrics
+from .querystats import QueryStatsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm connections and caches in the background; /health reports when done"""
+    readiness.clear()
+    await invalidation_bus.start(engine)
+    warmup_task = asyncio.create_task(warm_up(AsyncSessionLocal))
+    flush_task = asyncio.create_task(flush_events_periodically(AsyncSessionLocal))
+    yield
+    warmup_task.cancel()
+    flush_task.cancel()
+    # Events still in the buffer would be lost with the process
+    async with AsyncSessionLocal() as db:
+        await event_buffer.flush(db)
+    await invalidation_bus.stop()
+
 
 app = FastAPI(
     title="KidLearn Education Platform API",
@@ -26,8 +53,18 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# Load shedding; added first so CORS headers still wrap its 503s
+app.add_middleware(AdmissionMiddleware)
+
+# Wraps admission, so latency includes queueing and shed requests are counted
+app.add_middleware(MetricsMiddleware)
+
+# Per-request query counts: Server-Timing header and N+1 warnings
+app.add_middleware(QueryStatsMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +80,8 @@ app.include_router(auth.router, prefix="/api/v1")
 app.include_router(users.router, prefix="/api/v1")
 app.include_router(materials.router, prefix="/api/v1")
 app.include_router(stats.router, prefix="/api/v1")
+app.include_router(analytics.router, prefix="/api/v1")
+app.include_router(home.router, prefix="/api/v1")
 
 # Static files for uploads
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
@@ -63,9 +102,31 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+async def health_check(response: Response):
+    """Readiness check: 503 until the startup warm-up has finished"""
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "warming up"}
+    return {"status": "healthy", "warmupSeconds": readiness.seconds}
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness check: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/metrics", response_class=Response)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Concurrency, queue depth and shed counts per route class"""
+    return admission.snapshot()
 
 # Mount frontend static files
 if os.path.exists(FRONTEND_DIR):
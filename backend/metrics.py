@@ -0,0 +1,150 @@
+"""
+Prometheus metrics for KidLearn API
+
+GET /metrics serves, in the Prometheus text format:
+
+- kidlearn_http_request_duration_seconds{method,route,status}: latency
+  histogram per route template (its _count is the request count)
+- kidlearn_http_requests_in_flight{route_class}: requests being served,
+  per admission class (read/write/auth/other)
+- kidlearn_admission_*: admission queue depth and shed counts
+- kidlearn_db_pool_*: connection pool size and checked-out connections
+- kidlearn_read_cache_requests_total{result}: read cache hits, stale
+  hits, coalesced waits and loads, for hit ratios
+- kidlearn_bcrypt_queue_seconds / kidlearn_bcrypt_seconds: time spent
+  waiting for, and running on, the password hashing threads
+
+Per-request work is kept small: label children are bound once per
+(method, route, status) and reused, and the gauges behind the pool,
+cache and admission numbers are only read when /metrics is scraped.
+"""
+
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import CollectorRegistry, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from .admission import admission
+from .coalesce import read_coalescer
+from .db import engine
+
+registry = CollectorRegistry()
+
+REQUEST_DURATION = Histogram(
+    "kidlearn_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=registry,
+)
+IN_FLIGHT = Gauge(
+    "kidlearn_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["route_class"],
+    registry=registry,
+)
+BCRYPT_QUEUE = Histogram(
+    "kidlearn_bcrypt_queue_seconds",
+    "Time a password hash waited for a worker thread",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=registry,
+)
+BCRYPT_DURATION = Histogram(
+    "kidlearn_bcrypt_seconds",
+    "Time spent hashing or verifying a password",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=registry,
+)
+
+ROUTE_CLASSES = ("read", "write", "auth", "other")
+_in_flight = {name: IN_FLIGHT.labels(name) for name in ROUTE_CLASSES}
+_durations: Dict[Tuple[str, str, int], object] = {}
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, status)
+    child = _durations.get(key)
+    if child is None:
+        child = _durations[key] = REQUEST_DURATION.labels(method, route, str(status))
+    child.observe(seconds)
+
+
+class RuntimeCollector:
+    """Reads pool, cache and admission state at scrape time"""
+
+    def collect(self):
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            size = GaugeMetricFamily("kidlearn_db_pool_size", "Configured pool size")
+            size.add_metric([], pool.size())
+            yield size
+            checked_out = GaugeMetricFamily("kidlearn_db_pool_checked_out", "Connections in use")
+            checked_out.add_metric([], pool.checkedout())
+            yield checked_out
+            overflow = GaugeMetricFamily("kidlearn_db_pool_overflow", "Connections opened beyond the pool size")
+            overflow.add_metric([], pool.overflow())
+            yield overflow
+
+        cache = CounterMetricFamily(
+            "kidlearn_read_cache_requests", "Read cache lookups by result", labels=["result"]
+        )
+        for result, count in read_coalescer.stats.items():
+            cache.add_metric([result], count)
+        yield cache
+
+        queue_depth = GaugeMetricFamily(
+            "kidlearn_admission_queue_depth", "Requests waiting for a slot", labels=["route_class"]
+        )
+        shed = CounterMetricFamily(
+            "kidlearn_admission_shed", "Requests rejected by admission control", labels=["route_class"]
+        )
+        for name, limiter in admission.limiters.items():
+            queue_depth.add_metric([name], limiter.queue_depth)
+            shed.add_metric([name], limiter.shed)
+        yield queue_depth
+        yield shed
+
+
+registry.register(RuntimeCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per route template and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        in_flight = _in_flight[admission.classify(scope["method"], scope["path"]) or "other"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            # Set by the router once matched (templates are relative to the /api/v1 prefix);
+            # unmatched and shed requests share one series
+            route = scope.get("route")
+            observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+                time.perf_counter() - start,
+            )
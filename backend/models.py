@@ -4,7 +4,7 @@ Pydantic models for the KidLearn API
 
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -30,6 +30,28 @@ class GradeLevel(str, Enum):
     grade5 = "grade5"
 
 
+class MaterialSort(str, Enum):
+    newest = "newest"
+    downloads = "downloads"
+    likes = "likes"
+    title = "title"
+
+
+class MaterialEventType(str, Enum):
+    download = "download"
+    like = "like"
+
+
+class RollupGranularity(str, Enum):
+    hour = "hour"
+    day = "day"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 # User Models
 class UserBase(BaseModel):
     email: EmailStr
@@ -87,6 +109,7 @@ class Material(MaterialBase):
     author_id: str
     author_name: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
     downloads: int = 0
     likes: int = 0
 
@@ -97,6 +120,58 @@ class Material(MaterialBase):
 class MaterialList(BaseModel):
     items: list[Material]
     total: int
+    facets: Optional[dict[str, dict[str, int]]] = None
+
+
+class TrendingMaterial(Material):
+    trending_score: float
+
+
+class TrendingList(BaseModel):
+    items: list[TrendingMaterial]
+
+
+class RelatedMaterial(Material):
+    similarity: float
+
+
+class RelatedList(BaseModel):
+    items: list[RelatedMaterial]
+
+
+class Suggestion(BaseModel):
+    text: str
+    kind: str  # "title" or "tag"
+    material_id: Optional[str] = None
+
+
+class SuggestionList(BaseModel):
+    items: list[Suggestion]
+
+
+class MaterialBatchRequest(BaseModel):
+    ids: list[str] = Field(min_length=1)
+
+
+class MaterialBatch(BaseModel):
+    """Materials in request order, plus the ids that were not found"""
+    items: list[Material]
+    missing: list[str] = []
+
+
+class MaterialChanges(BaseModel):
+    items: list[Material]
+    deleted: list[str]
+    # Opaque cursor to pass back as `since`
+    next_token: str
+    has_more: bool
+
+
+class MaterialFieldList(BaseModel):
+    """Sparse listing: each item only carries the requested fields"""
+    items: list[dict[str, Any]]
+    total: int
+    facets: Optional[dict[str, dict[str, int]]] = None
 
 
 # Stats Models
@@ -107,6 +182,40 @@ class Stats(BaseModel):
     grade_breakdown: dict[str, int]
 
 
+class AuthorDashboardStats(BaseModel):
+    material_count: int = 0
+    total_downloads: int = 0
+    total_likes: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+# Home Page Models
+class HomePage(BaseModel):
+    stats: Stats
+    featured: list[Material]
+    user: Optional[User] = None
+
+
+# Analytics Models
+class ActivityBucket(BaseModel):
+    bucket_start: datetime
+    downloads: int = 0
+    likes: int = 0
+
+
+class MaterialActivity(BaseModel):
+    material_id: str
+    granularity: RollupGranularity
+    buckets: list[ActivityBucket]
+
+
+class GradeActivity(BaseModel):
+    granularity: RollupGranularity
+    grades: dict[str, list[ActivityBucket]]
+
+
 # Response Models
 class ErrorResponse(BaseModel):
     error: str
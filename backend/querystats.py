@@ -0,0 +1,152 @@
+"""
+Per-request SQL instrumentation for KidLearn API
+
+SQLAlchemy engine events time every statement and add it to the stats of
+the request that issued it (held in a contextvar, so concurrent requests
+and the tasks they spawn each count their own queries). Per request:
+
+- a `Server-Timing: db;dur=<ms>;desc="<n> queries"` response header
+- a warning when one statement fingerprint runs more than
+  QUERY_REPEAT_WARN times (usually an N+1 loop)
+
+Tests wrap calls in nested QueryStats scopes to enforce query budgets
+(statements and fetched rows per endpoint, see tests/test_query_budgets.py).
+
+Statements slower than SLOW_QUERY_MS are logged with their fingerprint:
+the SQL with literals and parameters replaced by `?` and IN lists
+collapsed, so the same query with different values groups together.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_REPEAT_WARN = int(os.getenv("QUERY_REPEAT_WARN", "5"))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    statement = _STRING.sub("?", statement)
+    statement = _PARAM.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("(?+)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_statement(statement).encode()).hexdigest()[:12]
+
+
+class QueryStats:
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        # Queries also count towards an enclosing scope (e.g. a test's query budget)
+        self.parent = parent
+        self.count = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float, rows: int = 0) -> None:
+        self.count += 1
+        self.rows += rows
+        self.seconds += seconds
+        self.statements[statement] += 1
+        if self.parent is not None:
+            self.parent.record(statement, seconds, rows)
+
+    def repeated(self, threshold: int = QUERY_REPEAT_WARN) -> list:
+        """(fingerprint, normalized sql, count) for statements run more than `threshold` times"""
+        by_fingerprint: Counter = Counter()
+        sql = {}
+        for statement, count in self.statements.items():
+            key = fingerprint(statement)
+            by_fingerprint[key] += count
+            sql.setdefault(key, statement)
+        return [
+            (key, normalize_statement(sql[key]), count)
+            for key, count in by_fingerprint.most_common()
+            if count > threshold
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        # Async drivers buffer the whole result during execute; server-side cursors have no buffer
+        stats.record(statement, seconds, len(getattr(cursor, "_rows", ())))
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query %.1fms [%s] %s",
+            seconds * 1000, fingerprint(statement), normalize_statement(statement)[:500],
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for a failed statement
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware counting each request's queries and reporting them"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(parent=current_query_stats.get())
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Streaming bodies may still query; the header covers work done so far
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", stats.server_timing().encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            for key, sql, count in stats.repeated(QUERY_REPEAT_WARN):
+                logger.warning(
+                    "Possible N+1: %s %s ran [%s] %d times: %s",
+                    scope["method"], scope["path"], key, count, sql[:500],
+                )
@@ -0,0 +1,188 @@
+"""
+Rate limiting for KidLearn API
+
+Token buckets guard the endpoints that are expensive per call: login
+(bcrypt), register, like and download. Buckets are keyed by client IP;
+signed-in actions also get a bucket per user id. They refill lazily when
+touched:
+
+    tokens = min(capacity, tokens + elapsed * capacity / period)
+
+Limits are "<requests>/<seconds>" per endpoint, overridable with
+RATE_LIMIT_<ENDPOINT> (e.g. RATE_LIMIT_LOGIN=20/60). Requests over the
+limit get 429 with Retry-After.
+
+Backends (RATE_LIMIT_BACKEND):
+- memory (default): a dict of (tokens, timestamp) tuples per process,
+  swept of idle buckets every SWEEP_SECONDS
+- database: the `rate_limit_buckets` table, shared by every replica
+"""
+
+import math
+import os
+import time
+from typing import Dict, NamedTuple, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .db import get_session_factory
+from .db_models import RateLimitBucket
+from .models import User
+
+SWEEP_SECONDS = 60
+
+
+class RateLimit(NamedTuple):
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        requests, _, seconds = value.partition("/")
+        return cls(int(requests), float(seconds))
+
+
+DEFAULT_LIMITS = {
+    "login": "10/60",
+    "register": "5/3600",
+    "like": "30/60",
+    "download": "60/60",
+}
+
+LIMITS: Dict[str, RateLimit] = {
+    name: RateLimit.parse(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+    for name, default in DEFAULT_LIMITS.items()
+}
+
+# A bucket left alone this long is full again, so it can be forgotten
+IDLE_SECONDS = max(limit.period for limit in LIMITS.values())
+
+
+def refill(tokens: float, stamp: float, now: float, limit: RateLimit) -> float:
+    return min(limit.capacity, tokens + (now - stamp) * limit.rate)
+
+
+def retry_after(tokens: float, limit: RateLimit) -> float:
+    """Seconds until the bucket holds one whole token"""
+    return (1 - tokens) / limit.rate
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._next_sweep = time.monotonic() + SWEEP_SECONDS
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def sweep(self, now: float) -> None:
+        cutoff = now - IDLE_SECONDS
+        self._buckets = {k: v for k, v in self._buckets.items() if v[1] >= cutoff}
+        self._next_sweep = now + SWEEP_SECONDS
+
+    async def take(self, key: str, limit: RateLimit, session_factory: async_sessionmaker) -> float:
+        """Spend one token; returns 0 if allowed, else seconds to wait"""
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        tokens, stamp = self._buckets.get(key, (limit.capacity, now))
+        tokens = refill(tokens, stamp, now, limit)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return retry_after(tokens, limit)
+        self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+
+class DatabaseBackend:
+    """Buckets in the shared database; one short transaction per check"""
+
+    def __init__(self):
+        self._next_sweep = time.time() + SWEEP_SECONDS
+
+    def clear(self) -> None:
+        pass
+
+    async def take(self, key: str, limit: RateLimit, session_factory: async_sessionmaker) -> float:
+        now = time.time()
+        async with session_factory() as db:
+            if now >= self._next_sweep:
+                self._next_sweep = now + SWEEP_SECONDS
+                await db.execute(delete(RateLimitBucket).where(RateLimitBucket.updated_at < now - IDLE_SECONDS))
+
+            bucket = await db.get(RateLimitBucket, key, with_for_update=True)
+            if bucket is None:
+                db.add(RateLimitBucket(key=key, tokens=limit.capacity - 1, updated_at=now))
+                try:
+                    await db.commit()
+                    return 0.0
+                except IntegrityError:
+                    # Another replica created it first
+                    await db.rollback()
+                    bucket = await db.get(RateLimitBucket, key, with_for_update=True)
+
+            tokens = refill(bucket.tokens, bucket.updated_at, now, limit)
+            wait = retry_after(tokens, limit) if tokens < 1 else 0.0
+            bucket.tokens = tokens if wait else tokens - 1
+            bucket.updated_at = now
+            await db.commit()
+            return wait
+
+
+def create_backend(name: str = os.getenv("RATE_LIMIT_BACKEND", "memory")):
+    return DatabaseBackend() if name == "database" else MemoryBackend()
+
+
+rate_limit_backend = create_backend()
+
+
+async def check_rate_limit(name: str, identity: str, session_factory: async_sessionmaker) -> None:
+    limit = LIMITS[name]
+    wait = await rate_limit_backend.take(f"{name}:{identity}", limit, session_factory)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please slow down",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def client_ip(request: Request) -> str:
+    # Behind a trusted proxy (FORWARDED_ALLOW_IPS), uvicorn --proxy-headers puts the real client here
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(name: str):
+    """Dependency: rate limit endpoint `name` per client IP"""
+    async def dependency(
+        request: Request,
+        session_factory: async_sessionmaker = Depends(get_session_factory),
+    ) -> None:
+        await check_rate_limit(name, client_ip(request), session_factory)
+    return dependency
+
+
+def limit_by_user(name: str, user_dependency):
+    """Dependency: rate limit endpoint `name` per signed-in user and per client IP
+
+    The IP bucket stops one client spreading requests over many accounts.
+    """
+    async def dependency(
+        request: Request,
+        current_user: User = Depends(user_dependency),
+        session_factory: async_sessionmaker = Depends(get_session_factory),
+    ) -> None:
+        await check_rate_limit(name, f"user:{current_user.id}", session_factory)
+        await check_rate_limit(name, f"ip:{client_ip(request)}", session_factory)
+    return dependency
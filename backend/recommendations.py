@@ -0,0 +1,332 @@
+"""
+Related-materials recommendations for KidLearn API
+
+Similarity between two materials of the same grade level is a blend of
+- cosine similarity of TF-IDF vectors over title + description
+- cosine similarity of their tag sets (tag co-occurrence)
+
+The full build is done offline with sparse matrix products and stores the
+top-k neighbours of every material in `material_neighbors`, so serving
+`/materials/{id}/related` is a single indexed read. New materials are
+folded in incrementally: the vocabulary and IDF weights stay fixed until
+the next full build, the new item gets its own top-k list, and existing
+items only change if the new item beats their current k-th neighbour.
+
+The in-memory index is loaded at startup (warm-up): vectors are rebuilt in
+a worker thread and the neighbour lists are read back from the table.
+Requests never build it; materials created before it is ready are queued
+and folded in once it is.
+
+Rebuild everything (e.g. nightly):
+
+    python -m backend.recommendations
+"""
+
+import asyncio
+import os
+import re
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db_models import Material, MaterialNeighbor
+
+RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", "10"))
+# Share of the score coming from text; the rest comes from tags
+TEXT_WEIGHT = 0.6
+TITLE_BOOST = 2
+# Rows per block when computing similarities, bounds memory to CHUNK x grade size
+CHUNK_ROWS = 1024
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from fun in into is it its of on or the to with your you".split()
+)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _normalize_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+
+class SimilarityIndex:
+    """In-memory vectors and neighbour lists for the whole catalog"""
+
+    def __init__(self, top_k: int = RELATED_TOP_K):
+        self.top_k = top_k
+        self.loaded = False
+        self.ids: List[str] = []
+        self.position: dict = {}
+        self.grades: List[str] = []
+        self.vocab: dict = {}
+        self.idf = np.zeros(0)
+        self.tag_vocab: dict = {}
+        self.text = sparse.csr_matrix((0, 0))
+        self.tags = sparse.csr_matrix((0, 0))
+        # material id -> [(score, neighbour id)], best first
+        self.neighbors: dict = {}
+        # (id, grade_level, title, description, tags) created while not loaded
+        self.pending: List[tuple] = []
+
+    def clear(self) -> None:
+        self.__init__(self.top_k)
+
+    def replace_with(self, other: "SimilarityIndex") -> List[tuple]:
+        """Take over a freshly built index; returns the rows queued meanwhile, to fold in"""
+        pending = self.pending
+        self.__dict__.update(other.__dict__)
+        self.pending = []
+        return pending
+
+    # Vectorizing
+
+    def _term_counts(self, title: str, description: str) -> Counter:
+        counts = Counter(tokenize(description))
+        for term in tokenize(title):
+            counts[term] += TITLE_BOOST
+        return counts
+
+    def _vectorize(self, title: str, description: str, tags: List[str]):
+        """Vectors for one item against the current vocabularies (unknown terms dropped)"""
+        counts = self._term_counts(title, description)
+        cols = [self.vocab[t] for t in counts if t in self.vocab]
+        data = [counts[t] * self.idf[self.vocab[t]] for t in counts if t in self.vocab]
+        text = sparse.csr_matrix((data, ([0] * len(cols), cols)), shape=(1, len(self.vocab)))
+
+        tag_cols = sorted({self.tag_vocab[t] for t in tags if t in self.tag_vocab})
+        tag_vec = sparse.csr_matrix(
+            ([1.0] * len(tag_cols), ([0] * len(tag_cols), tag_cols)), shape=(1, len(self.tag_vocab))
+        )
+        return _normalize_rows(text), _normalize_rows(tag_vec)
+
+    def build(self, rows: List[Tuple[str, str, str, str, List[str]]], rank: bool = True) -> None:
+        """Full build from (id, grade_level, title, description, tags) rows
+
+        With rank=False only the vectors are built; the caller supplies the
+        neighbour lists (e.g. the stored ones).
+        """
+        if not rows:
+            self.clear()
+            self.loaded = True
+            return
+
+        self.ids = [r[0] for r in rows]
+        self.position = {material_id: i for i, material_id in enumerate(self.ids)}
+        self.grades = [r[1] for r in rows]
+
+        counts = [self._term_counts(r[2], r[3]) for r in rows]
+        self.vocab = {}
+        for c in counts:
+            for term in c:
+                self.vocab.setdefault(term, len(self.vocab))
+        self.tag_vocab = {}
+        for r in rows:
+            for tag in r[4]:
+                self.tag_vocab.setdefault(tag, len(self.tag_vocab))
+
+        indptr, indices, data = [0], [], []
+        for c in counts:
+            indices.extend(self.vocab[t] for t in c)
+            data.extend(c.values())
+            indptr.append(len(indices))
+        tf = sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(self.vocab)), dtype=np.float64)
+
+        df = np.bincount(tf.indices, minlength=len(self.vocab))
+        self.idf = np.log((1 + len(rows)) / (1 + df)) + 1.0
+        self.text = _normalize_rows(tf @ sparse.diags(self.idf))
+
+        indptr, indices = [0], []
+        for r in rows:
+            indices.extend(sorted({self.tag_vocab[t] for t in r[4]}))
+            indptr.append(len(indices))
+        self.tags = _normalize_rows(sparse.csr_matrix(
+            (np.ones(len(indices)), indices, indptr), shape=(len(rows), len(self.tag_vocab))
+        ))
+
+        self.neighbors = {}
+        if rank:
+            grades = np.array(self.grades, dtype=object)
+            for grade in set(self.grades):
+                members = np.flatnonzero(grades == grade)
+                self._rank_within(members)
+        self.loaded = True
+
+    def _similarity(self, rows: np.ndarray, members: np.ndarray) -> np.ndarray:
+        text = self.text[rows] @ self.text[members].T
+        tags = self.tags[rows] @ self.tags[members].T
+        return (TEXT_WEIGHT * text + (1 - TEXT_WEIGHT) * tags).toarray()
+
+    def _top_k(self, scores: np.ndarray, members: np.ndarray) -> List[Tuple[float, str]]:
+        k = min(self.top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k] if k else []
+        return sorted(
+            ((float(scores[j]), self.ids[members[j]]) for j in best if scores[j] > 0),
+            reverse=True,
+        )
+
+    def _rank_within(self, members: np.ndarray) -> None:
+        for start in range(0, len(members), CHUNK_ROWS):
+            block = members[start:start + CHUNK_ROWS]
+            scores = self._similarity(block, members)
+            for offset, row in enumerate(block):
+                # Never recommend a material to itself
+                scores[offset, start + offset] = 0.0
+                self.neighbors[self.ids[row]] = self._top_k(scores[offset], members)
+
+    def add(self, material_id: str, grade_level: str, title: str, description: str, tags: List[str]):
+        """Fold one new material in; returns {material id: new neighbour list} for changed lists
+
+        A material whose vectors are already loaded (created while the index
+        was loading) only gets its neighbour lists ranked.
+        """
+        row = self.position.get(material_id)
+        if row is None:
+            text, tag_vec = self._vectorize(title, description, tags)
+            row = len(self.ids)
+            self.ids.append(material_id)
+            self.position[material_id] = row
+            self.grades.append(grade_level)
+            self.text = sparse.vstack([self.text, text], format="csr")
+            self.tags = sparse.vstack([self.tags, tag_vec], format="csr")
+        members = np.flatnonzero(np.array(self.grades, dtype=object) == grade_level)
+        members = members[members != row]
+
+        if len(members):
+            scores = self._similarity(np.array([row]), members)[0]
+        else:
+            scores = np.zeros(0)
+        changed = {material_id: self._top_k(scores, members)}
+
+        for j, score in zip(members, scores):
+            if score <= 0:
+                continue
+            other = self.ids[j]
+            current = [pair for pair in self.neighbors.get(other, []) if pair[1] != material_id]
+            if len(current) < self.top_k or score > current[-1][0]:
+                changed[other] = sorted(current + [(float(score), material_id)], reverse=True)[:self.top_k]
+
+        self.neighbors.update(changed)
+        return changed
+
+    def remove(self, material_id: str) -> None:
+        """Forget a deleted material, mirroring what delete_material does to the table"""
+        self.neighbors.pop(material_id, None)
+        for other, current in self.neighbors.items():
+            if any(neighbor_id == material_id for _, neighbor_id in current):
+                self.neighbors[other] = [pair for pair in current if pair[1] != material_id]
+        if material_id in self.position:
+            # Its vectors stay, but without a grade it is never ranked again
+            self.grades[self.position[material_id]] = None
+        self.pending = [row for row in self.pending if row[0] != material_id]
+
+
+related_index = SimilarityIndex()
+
+
+async def _persist(db: AsyncSession, lists: dict) -> None:
+    if not lists:
+        return
+    await db.execute(delete(MaterialNeighbor).where(MaterialNeighbor.material_id.in_(list(lists))))
+    rows = [
+        {"material_id": material_id, "neighbor_id": neighbor_id, "rank": rank, "score": score}
+        for material_id, neighbors in lists.items()
+        for rank, (score, neighbor_id) in enumerate(neighbors)
+    ]
+    if rows:
+        await db.execute(insert(MaterialNeighbor), rows)
+
+
+async def _index_rows(db: AsyncSession) -> List[tuple]:
+    result = await db.execute(
+        select(Material.id, Material.grade_level, Material.title, Material.description, Material.tags)
+        .order_by(Material.id)
+    )
+    return [tuple(r) for r in result.all()]
+
+
+def _fold_in(index: SimilarityIndex, rows: List[tuple]) -> dict:
+    changed = {}
+    for material_id, grade_level, title, description, tags in rows:
+        changed.update(index.add(material_id, grade_level, title, description, tags or []))
+    return changed
+
+
+async def rebuild_related_index(db: AsyncSession, index: SimilarityIndex = related_index) -> int:
+    """Full offline build; replaces every stored neighbour list"""
+    built = SimilarityIndex(index.top_k)
+    # CPU bound (sparse products over each grade); keep the event loop serving
+    await asyncio.to_thread(built.build, await _index_rows(db))
+    _fold_in(index, index.replace_with(built))
+
+    await db.execute(delete(MaterialNeighbor))
+    await _persist(db, index.neighbors)
+    await db.commit()
+    return len(index.ids)
+
+
+async def load_related_index(db: AsyncSession, index: SimilarityIndex = related_index) -> int:
+    """Load the index for incremental adds: vectors from the catalog, neighbour lists as stored"""
+    rows = await _index_rows(db)
+    result = await db.execute(
+        select(MaterialNeighbor.material_id, MaterialNeighbor.score, MaterialNeighbor.neighbor_id)
+        .order_by(MaterialNeighbor.material_id, MaterialNeighbor.rank)
+    )
+    stored = result.all()
+
+    built = SimilarityIndex(index.top_k)
+    await asyncio.to_thread(built.build, rows, False)
+    built.neighbors = {material_id: [] for material_id in built.ids}
+    for material_id, score, neighbor_id in stored:
+        built.neighbors.setdefault(material_id, []).append((score, neighbor_id))
+
+    changed = _fold_in(index, index.replace_with(built))
+    await _persist(db, changed)
+    await db.commit()
+    return len(index.ids)
+
+
+async def add_related_material(db: AsyncSession, material: Material, index: SimilarityIndex = related_index) -> None:
+    """Incrementally index a newly created material (queued until the index is loaded)"""
+    row = (material.id, material.grade_level, material.title, material.description, material.tags or [])
+    if not index.loaded:
+        # Never build in a request; the next load or rebuild folds it in
+        index.pending.append(row)
+        return
+
+    changed = _fold_in(index, [row])
+    await _persist(db, changed)
+    await db.commit()
+
+
+async def get_related_materials(
+    db: AsyncSession, material_id: str, limit: int = RELATED_TOP_K
+) -> List[Tuple[Material, float]]:
+    result = await db.execute(
+        select(Material, MaterialNeighbor.score)
+        .join(MaterialNeighbor, MaterialNeighbor.neighbor_id == Material.id)
+        .where(MaterialNeighbor.material_id == material_id)
+        .order_by(MaterialNeighbor.rank)
+        .limit(limit)
+    )
+    return [(m, score) for m, score in result.all()]
+
+
+async def main() -> None:
+    from .db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        count = await rebuild_related_index(session)
+    print(f"Indexed {count} materials")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Analytics router for KidLearn API
+
+Everything here reads pre-aggregated rollups (see backend/events.py),
+never the raw event log.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_db
+from ..models import GradeLevel, RollupGranularity, MaterialActivity, GradeActivity, ActivityBucket
+from ..events import get_material_activity, get_grade_activity, default_since
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+@router.get("/materials/{material_id}", response_model=MaterialActivity)
+async def material_activity(
+    material_id: str,
+    granularity: RollupGranularity = Query(RollupGranularity.day, description="Bucket size"),
+    since: Optional[datetime] = Query(None, description="Start of the window (default: last 7 days / 48 hours)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Downloads and likes per time bucket for one material"""
+    buckets = await get_material_activity(
+        db, material_id, granularity, since or default_since(granularity)
+    )
+    
+    return MaterialActivity(
+        material_id=material_id,
+        granularity=granularity,
+        buckets=[ActivityBucket(**b) for b in buckets],
+    )
+
+
+@router.get("/grades", response_model=GradeActivity)
+async def grade_activity(
+    granularity: RollupGranularity = Query(RollupGranularity.day, description="Bucket size"),
+    since: Optional[datetime] = Query(None, description="Start of the window (default: last 7 days / 48 hours)"),
+    grade_level: Optional[GradeLevel] = Query(None, alias="gradeLevel", description="Only this grade level"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Downloads and likes per time bucket, broken down by grade level"""
+    grades = await get_grade_activity(
+        db, granularity, since or default_since(granularity), grade_level
+    )
+    
+    return GradeActivity(
+        granularity=granularity,
+        grades={
+            grade: [ActivityBucket(**b) for b in buckets]
+            for grade, buckets in grades.items()
+        },
+    )
@@ -24,7 +24,9 @@ from ..database import (
     get_user_by_id,
     create_user,
     verify_password,
+    run_password_hashing,
 )
+from ..ratelimit import limit_by_ip
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
@@ -91,7 +93,7 @@ async def get_current_user_optional(
         return None
 
 
-@router.post("/register", response_model=AuthResponse, status_code=201)
+@router.post("/register", response_model=AuthResponse, status_code=201, dependencies=[Depends(limit_by_ip("register"))])
 async def register(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db),
@@ -126,7 +128,7 @@ async def register(
     )
 
 
-@router.post("/login", response_model=AuthResponse)
+@router.post("/login", response_model=AuthResponse, dependencies=[Depends(limit_by_ip("login"))])
 async def login(
     login_data: LoginRequest,
     db: AsyncSession = Depends(get_db),
@@ -134,7 +136,9 @@ async def login(
     """Login with email and password"""
     user_in_db = await get_user_by_email(db, login_data.email)
     
-    if not user_in_db or not verify_password(login_data.password, user_in_db.hashed_password):
+    if not user_in_db or not await run_password_hashing(
+        verify_password, login_data.password, user_in_db.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
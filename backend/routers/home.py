@@ -0,0 +1,62 @@
+"""
+Home page router for KidLearn API
+
+One request for everything the landing page shows. Sections are loaded
+concurrently, each on its own session, and the cacheable ones go through
+the read cache under the same keys as their standalone endpoints, so a
+warm section costs no connection at all.
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..db import get_session_factory
+from ..models import HomePage, User, MaterialSort
+from ..database import get_user_by_id
+from ..coalesce import read_coalescer
+from .auth import decode_token
+from .materials import material_list_key, load_material_list
+from .stats import STATS_KEY, load_platform_stats
+
+router = APIRouter(prefix="/home", tags=["Home"])
+
+
+@router.get("", response_model=HomePage)
+async def get_home(
+    featured_limit: int = Query(4, ge=1, le=20, alias="featuredLimit", description="Number of newest materials"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    """Get the platform stats, the newest materials and (if signed in) the current user"""
+    filters = dict(material_type=None, grade_level=None, search=None)
+
+    async def load_stats():
+        async with session_factory() as db:
+            return await load_platform_stats(db)
+
+    async def load_featured():
+        async with session_factory() as db:
+            return await load_material_list(db, None, [], filters, featured_limit, 0, MaterialSort.newest)
+
+    async def load_user() -> Optional[User]:
+        # Like get_current_user_optional: a bad token just means signed out
+        user_id = decode_token(credentials.credentials) if credentials else None
+        if not user_id:
+            return None
+        async with session_factory() as db:
+            user_db = await get_user_by_id(db, user_id)
+        return User.model_validate(user_db) if user_db else None
+
+    stats, featured, user = await asyncio.gather(
+        read_coalescer.get(STATS_KEY, load_stats),
+        read_coalescer.get(
+            material_list_key(filters, featured_limit, 0, MaterialSort.newest), load_featured
+        ),
+        load_user(),
+    )
+
+    return HomePage(stats=stats, featured=featured.items, user=user)
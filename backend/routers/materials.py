@@ -2,58 +2,364 @@
 Materials router for KidLearn API
 """
 
-from typing import Optional
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..db import get_db
+from ..db import get_db, get_session_factory
 from ..models import (
     User,
     Material,
     MaterialCreate,
     MaterialList,
+    MaterialFieldList,
+    MaterialBatch,
+    MaterialBatchRequest,
+    TrendingMaterial,
+    TrendingList,
+    RelatedMaterial,
+    RelatedList,
+    Suggestion,
+    SuggestionList,
     MaterialType,
     GradeLevel,
+    MaterialSort,
     DownloadResponse,
     LikeResponse,
     UserRole,
+    MaterialEventType,
+    ExportFormat,
+    MaterialChanges,
 )
 from ..database import (
+    MATERIAL_CARD_FIELDS,
     get_materials,
+    get_material_fields,
+    get_material_facets,
     get_material_by_id,
+    get_materials_by_ids,
+    stream_material_rows,
+    get_material_changes,
     create_material,
     increment_downloads,
     increment_likes,
 )
+from ..events import record_material_event
+from ..trending import get_trending_materials
+from ..recommendations import add_related_material, get_related_materials
+from ..suggest import suggest_index, rebuild_suggest_index
+from ..catalog import materials_catalog, load_catalog, material_row
+from ..coalesce import read_coalescer
+from ..live import counter_broker, encode_event
+from ..ratelimit import limit_by_ip, limit_by_user
 from .auth import get_current_user
 
 router = APIRouter(prefix="/materials", tags=["Materials"])
 
+# Upper bound on ids resolved by a single batch request
+MAX_BATCH_SIZE = 100
+
+# Idle time after which an event stream sends a keep-alive comment
+SSE_KEEPALIVE_SECONDS = 15
+
+# Named projections accepted by `fields=`
+FIELD_PRESETS = {
+    "card": MATERIAL_CARD_FIELDS,
+}
+
+
+# Facets accepted by `facets=` (named after their query parameters)
+FACETS = ("type", "gradeLevel")
+
+
+def parse_facets(facets: Optional[str]) -> list[str]:
+    requested = [f.strip() for f in (facets or "").split(",") if f.strip()]
+    unknown = [f for f in requested if f not in FACETS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown facets: {', '.join(unknown)}",
+        )
+    return list(dict.fromkeys(requested))
+
+
+def parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    """Resolve a `fields=` value into a list of Material columns (None = all)"""
+    if not fields:
+        return None
+    
+    if fields in FIELD_PRESETS:
+        return list(FIELD_PRESETS[fields])
+    
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in Material.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    
+    # Always include the id so clients can link to the detail view
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
 
-@router.get("", response_model=MaterialList)
+@router.get("", response_model=Union[MaterialList, MaterialFieldList])
 async def list_materials(
     type: Optional[MaterialType] = Query(None, description="Filter by material type"),
     grade_level: Optional[GradeLevel] = Query(None, alias="gradeLevel", description="Filter by grade level"),
     search: Optional[str] = Query(None, description="Search in title, description, and tags"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of results"),
     offset: int = Query(0, ge=0, description="Number of results to skip"),
+    sort: MaterialSort = Query(MaterialSort.newest, description="Sort order (ties broken by id)"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, or 'card' for the catalog grid projection",
+    ),
+    facets: Optional[str] = Query(
+        None,
+        description="Comma-separated facets to count (type, gradeLevel)",
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """Get a list of all materials with optional filters"""
-    materials_db, total = await get_materials(
-        db,
-        material_type=type,
-        grade_level=grade_level,
-        search=search,
-        limit=limit,
-        offset=offset,
+    columns = parse_fields(fields)
+    facet_names = parse_facets(facets)
+    filters = dict(material_type=type, grade_level=grade_level, search=search)
+    
+    key = material_list_key(filters, limit, offset, sort, columns, facet_names)
+    return await read_coalescer.get(
+        key, lambda: load_material_list(db, columns, facet_names, filters, limit, offset, sort)
+    )
+
+
+def material_list_key(filters, limit, offset, sort, columns=None, facet_names=()):
+    # Search is case-insensitive in both engines, so "Apple" and "apple" share a key
+    search = filters["search"]
+    return (
+        "materials.list", filters["material_type"], filters["grade_level"],
+        search.lower() if search else None,
+        limit, offset, sort, tuple(columns or ()), tuple(facet_names),
+    )
+
+
+async def load_material_list(db, columns, facet_names, filters, limit, offset, sort):
+    """The listing itself; runs once per key for concurrent identical requests"""
+    list_model = MaterialFieldList if columns else MaterialList
+    
+    if materials_catalog.enabled:
+        return await list_from_catalog(
+            db, list_model, columns, facet_names, filters, limit, offset, sort
+        )
+    
+    if columns:
+        items, total = await get_material_fields(
+            db,
+            columns,
+            limit=limit,
+            offset=offset,
+            sort=sort,
+            include_total=not facet_names,
+            **filters,
+        )
+    else:
+        materials_db, total = await get_materials(
+            db,
+            limit=limit,
+            offset=offset,
+            sort=sort,
+            include_total=not facet_names,
+            **filters,
+        )
+        # Convert DB models to Pydantic models
+        items = [Material.model_validate(m) for m in materials_db]
+    
+    facet_counts = None
+    if facet_names:
+        # The grouped facet query also yields the total, replacing the COUNT
+        total, all_facets = await get_material_facets(db, **filters)
+        facet_counts = {name: all_facets[name] for name in facet_names}
+    
+    return list_model(items=items, total=total, facets=facet_counts)
+
+
+async def list_from_catalog(db, list_model, columns, facet_names, filters, limit, offset, sort):
+    """list_materials served by the in-memory columnar catalog"""
+    if not materials_catalog.loaded:
+        await load_catalog(db)
+    
+    items, total = materials_catalog.query(
+        limit=limit, offset=offset, sort=sort, fields=columns, **filters
     )
+    if not columns:
+        items = [Material.model_validate(row) for row in items]
+    
+    facet_counts = None
+    if facet_names:
+        _, all_facets = materials_catalog.facets(**filters)
+        facet_counts = {name: all_facets[name] for name in facet_names}
+    
+    return list_model(items=items, total=total, facets=facet_counts)
+
+
+@router.get("/suggest", response_model=SuggestionList)
+async def suggest_materials(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions"),
+    fuzzy: bool = Query(False, description="Tolerate small typos in the last word"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Autocomplete titles and tags from the in-memory prefix index"""
+    if not suggest_index.loaded:
+        # Normally built at startup; only the first request after a cold start pays
+        await rebuild_suggest_index(db)
+    
+    return SuggestionList(items=[
+        Suggestion(**s) for s in suggest_index.suggest(q, limit=limit, fuzzy=fuzzy)
+    ])
+
+
+@router.get("/trending", response_model=TrendingList)
+async def list_trending_materials(
+    grade_level: Optional[GradeLevel] = Query(None, alias="gradeLevel", description="Filter by grade level"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get the materials with the most recent downloads and likes"""
+    trending = await get_trending_materials(db, grade_level=grade_level, limit=limit)
     
-    # Convert DB models to Pydantic models
-    materials = [Material.model_validate(m) for m in materials_db]
+    return TrendingList(items=[
+        TrendingMaterial(**Material.model_validate(m).model_dump(), trending_score=score)
+        for m, score in trending
+    ])
+
+
+async def resolve_batch(db: AsyncSession, ids: list[str]) -> MaterialBatch:
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_SIZE} ids can be requested at once",
+        )
     
-    return MaterialList(items=materials, total=total)
+    found = {m.id: m for m in await get_materials_by_ids(db, ids)}
+    
+    return MaterialBatch(
+        items=[Material.model_validate(found[i]) for i in ids if i in found],
+        missing=[i for i in ids if i not in found],
+    )
+
+
+@router.get("/batch", response_model=MaterialBatch)
+async def get_material_batch(
+    ids: str = Query(..., description="Comma-separated material ids"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get several materials at once, in the order requested"""
+    return await resolve_batch(db, [i.strip() for i in ids.split(",") if i.strip()])
+
+
+@router.post("/batch", response_model=MaterialBatch)
+async def post_material_batch(
+    batch: MaterialBatchRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get several materials at once (for id lists too long for a URL)"""
+    return await resolve_batch(db, batch.ids)
+
+
+EXPORT_FIELDS = tuple(Material.model_fields)
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def parse_sync_token(token: Optional[str]) -> tuple[int, str]:
+    """Decode a `next_token` ("<change_seq>:<id>"); no token means a full sync"""
+    if not token:
+        return (-1, "")
+    seq, separator, last_id = token.partition(":")
+    try:
+        if not separator:
+            raise ValueError(token)
+        return int(seq), last_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token",
+        )
+
+
+@router.get("/changes", response_model=MaterialChanges)
+async def list_material_changes(
+    since: Optional[str] = Query(None, description="next_token from the previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of changes"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get materials created, updated or deleted since a sync token, oldest change first"""
+    changed, deleted, (seq, last_id), has_more = await get_material_changes(
+        db, parse_sync_token(since), limit=limit
+    )
+    
+    return MaterialChanges(
+        items=[Material.model_validate(m) for m in changed],
+        deleted=deleted,
+        next_token=f"{seq}:{last_id}",
+        has_more=has_more,
+    )
+
+
+def encode_ndjson(rows: list[dict]) -> str:
+    return "".join(Material.model_validate(row).model_dump_json() + "\n" for row in rows)
+
+
+def encode_csv(rows: list[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[f]) if f == "tags" else
+            row[f].isoformat() if isinstance(row[f], datetime) else row[f]
+            for f in EXPORT_FIELDS
+        ])
+    return buffer.getvalue()
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_materials(
+    format: ExportFormat = Query(ExportFormat.ndjson, description="ndjson (one material per line) or csv"),
+    type: Optional[MaterialType] = Query(None, description="Filter by material type"),
+    grade_level: Optional[GradeLevel] = Query(None, alias="gradeLevel", description="Filter by grade level"),
+    search: Optional[str] = Query(None, description="Search in title, description, and tags"),
+    sort: MaterialSort = Query(MaterialSort.newest, description="Sort order (ties broken by id)"),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    """Stream the whole (filtered) catalog in one response instead of paging with offset"""
+    async def body():
+        # The request's get_db session is closed before streaming starts, so use our own
+        async with session_factory() as db:
+            if format == ExportFormat.csv:
+                yield encode_csv([], header=True)
+            async for rows in stream_material_rows(
+                db, material_type=type, grade_level=grade_level, search=search, sort=sort
+            ):
+                yield encode_csv(rows) if format == ExportFormat.csv else encode_ndjson(rows)
+    
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="materials.{format.value}"'},
+    )
 
 
 @router.get("/{material_id}", response_model=Material)
@@ -62,15 +368,40 @@ async def get_material(
     db: AsyncSession = Depends(get_db),
 ):
     """Get detailed information about a specific material"""
-    material_db = await get_material_by_id(db, material_id)
+    async def load():
+        material_db = await get_material_by_id(db, material_id)
+        return Material.model_validate(material_db) if material_db else None
     
-    if not material_db:
+    material = await read_coalescer.get(("materials.detail", material_id), load)
+    
+    if not material:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Material not found",
         )
     
-    return Material.model_validate(material_db)
+    return material
+
+
+@router.get("/{material_id}/related", response_model=RelatedList)
+async def list_related_materials(
+    material_id: str,
+    limit: int = Query(10, ge=1, le=10, description="Maximum number of results"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get materials similar to this one (same grade level)"""
+    if not await get_material_by_id(db, material_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Material not found",
+        )
+    
+    related = await get_related_materials(db, material_id, limit=limit)
+    
+    return RelatedList(items=[
+        RelatedMaterial(**Material.model_validate(m).model_dump(), similarity=score)
+        for m, score in related
+    ])
 
 
 import os
@@ -132,11 +463,53 @@ async def submit_material(
         tags=tags,
         download_url=download_url,
     )
+    await add_related_material(db, material_db)
+    if suggest_index.loaded:
+        suggest_index.add(material_db.id, material_db.title, material_db.tags or [])
+    if materials_catalog.loaded:
+        materials_catalog.add(material_row(material_db))
     
     return Material.model_validate(material_db)
 
 
-@router.post("/{material_id}/download", response_model=DownloadResponse)
+@router.get("/{material_id}/events", response_class=StreamingResponse)
+async def material_events(
+    material_id: str,
+    request: Request,
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    """Server-Sent Events stream of this material's download and like counts"""
+    # A get_db session would hold its pooled connection until the stream ends
+    async with session_factory() as db:
+        material_db = await get_material_by_id(db, material_id)
+    if not material_db:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Material not found",
+        )
+    snapshot = {"id": material_id, "downloads": material_db.downloads, "likes": material_db.likes}
+    
+    async def stream():
+        queue = counter_broker.subscribe(material_id)
+        try:
+            yield encode_event("counters", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line; keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+        finally:
+            counter_broker.unsubscribe(material_id, queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{material_id}/download", response_model=DownloadResponse, dependencies=[Depends(limit_by_ip("download"))])
 async def download_material(
     material_id: str,
     db: AsyncSession = Depends(get_db),
@@ -151,14 +524,15 @@ async def download_material(
         )
 
     # Increment downloads
-    downloads = await increment_downloads(db, material_id)
+    await increment_downloads(db, material_id)
+    record_material_event(material_id, material_db.grade_level, MaterialEventType.download)
     
     download_url = material_db.download_url or f"/materials/{material_id}/download-file"
     
     return DownloadResponse(url=download_url)
 
 
-@router.post("/{material_id}/like", response_model=LikeResponse)
+@router.post("/{material_id}/like", response_model=LikeResponse, dependencies=[Depends(limit_by_user("like", get_current_user))])
 async def like_material(
     material_id: str,
     current_user: User = Depends(get_current_user),
@@ -173,4 +547,8 @@ async def like_material(
             detail="Material not found",
         )
     
+    # Already in the session's identity map after the increment, so no extra query
+    material_db = await get_material_by_id(db, material_id)
+    record_material_event(material_id, material_db.grade_level, MaterialEventType.like)
+    
     return LikeResponse(likes=likes)
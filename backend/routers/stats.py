@@ -8,13 +8,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..db import get_db
 from ..models import Stats
 from ..database import get_stats
+from ..coalesce import read_coalescer
 
 router = APIRouter(prefix="/stats", tags=["Stats"])
 
+STATS_KEY = ("stats",)
 
-@router.get("", response_model=Stats)
-async def get_platform_stats(db: AsyncSession = Depends(get_db)):
-    """Get overall platform statistics"""
+
+async def load_platform_stats(db: AsyncSession) -> Stats:
     stats = await get_stats(db)
     
     return Stats(
@@ -23,3 +24,9 @@ async def get_platform_stats(db: AsyncSession = Depends(get_db)):
         total_users=stats["total_users"],
         grade_breakdown=stats["grade_breakdown"],
     )
+
+
+@router.get("", response_model=Stats)
+async def get_platform_stats(db: AsyncSession = Depends(get_db)):
+    """Get overall platform statistics"""
+    return await read_coalescer.get(STATS_KEY, lambda: load_platform_stats(db))
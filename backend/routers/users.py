@@ -2,9 +2,12 @@
 Users router for KidLearn API
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models import User
+from ..db import get_db
+from ..models import User, Material, MaterialList, AuthorDashboardStats
+from ..database import get_author_materials, get_author_stats
 from .auth import get_current_user
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -14,3 +17,35 @@ router = APIRouter(prefix="/users", tags=["Users"])
 async def get_current_user_profile(current_user: User = Depends(get_current_user)):
     """Get the currently authenticated user's profile"""
     return current_user
+
+
+@router.get("/me/materials", response_model=MaterialList)
+async def list_my_materials(
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of results"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get the materials submitted by the current user, newest first"""
+    materials_db, total = await get_author_materials(
+        db, current_user.id, limit=limit, offset=offset
+    )
+    
+    return MaterialList(
+        items=[Material.model_validate(m) for m in materials_db],
+        total=total,
+    )
+
+
+@router.get("/me/stats", response_model=AuthorDashboardStats)
+async def get_my_stats(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get download, like and material totals for the current user's submissions"""
+    stats = await get_author_stats(db, current_user.id)
+    
+    if not stats:
+        return AuthorDashboardStats()
+    
+    return AuthorDashboardStats.model_validate(stats)
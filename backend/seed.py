@@ -13,7 +13,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from backend.db import DATABASE_URL, Base
 from backend.db_models import User, Material
 from backend.models import UserRole, MaterialType, GradeLevel
-from backend.database import get_password_hash
+from backend.database import get_password_hash, rebuild_author_stats
 
 # Create a dedicated engine for seeding
 engine = create_async_engine(DATABASE_URL)
@@ -188,6 +188,7 @@ async def seed_data():
         
         session.add_all(materials)
         await session.commit()
+        await rebuild_author_stats(session)
         print("Done!")
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+"""
+Search-box autocomplete for KidLearn API
+
+Suggestions are answered from an in-process prefix index and never touch
+the database. The index is a sorted list of normalized keys searched with
+bisect, with a parallel list of payloads:
+
+- every word of a title points at the whole title, so "apple" finds
+  "Counting Apples"
+- every distinct tag is one entry, ranked by how many materials use it
+
+It is built from the materials table at startup and updated in place when
+a material is created. Optional typo tolerance compares the query against
+a capped number of distinct words sharing its first letter with a bounded
+edit distance.
+"""
+
+import unicodedata
+from bisect import bisect_left
+from itertools import chain, islice
+from typing import Optional, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db_models import Material
+
+# Entries scanned per prefix lookup; bounds latency for short prefixes like "a"
+MAX_SCAN = 500
+
+# Known words scored per typo correction; bounds latency for common initials
+MAX_FUZZY_SCAN = 300
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def bounded_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """Levenshtein distance of a and b, or None once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+class SuggestIndex:
+    def __init__(self):
+        self.loaded = False
+        self._keys: List[str] = []
+        # (kind, text, material id or None, title weight)
+        self._payloads: List[Tuple[str, str, Optional[str], int]] = []
+        self._tag_counts: dict = {}
+        # first letter -> sorted distinct words; typos in the first letter
+        # are not corrected, which keeps each correction to one bucket
+        self._words: dict = {}
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _entries(self, material_id: str, title: str, tags: dict, downloads: int):
+        words = normalize(title).split()
+        for i in range(len(words)):
+            yield " ".join(words[i:]), ("title", title, material_id, downloads)
+        for key, tag in tags.items():
+            if key not in self._tag_counts:
+                yield key, ("tag", tag, None, 0)
+
+    def _add(self, material_id: str, title: str, tags: List[str], downloads: int, keep_sorted: bool) -> None:
+        # normalized -> original spelling, without duplicates
+        tags = {normalize(tag): tag for tag in tags if normalize(tag)}
+        entries = list(self._entries(material_id, title, tags, downloads))
+        for key in tags:
+            self._tag_counts[key] = self._tag_counts.get(key, 0) + 1
+        for word in set(normalize(title).split()) | tags.keys():
+            bucket = self._words.setdefault(word[0], [])
+            position = bisect_left(bucket, word)
+            if position == len(bucket) or bucket[position] != word:
+                bucket.insert(position, word)
+
+        for key, payload in entries:
+            if keep_sorted:
+                position = bisect_left(self._keys, key)
+                self._keys.insert(position, key)
+                self._payloads.insert(position, payload)
+            else:
+                self._keys.append(key)
+                self._payloads.append(payload)
+
+    def build(self, rows) -> None:
+        """Full build from (id, title, tags, downloads) rows"""
+        self.clear()
+        for material_id, title, tags, downloads in rows:
+            self._add(material_id, title, tags or [], downloads or 0, keep_sorted=False)
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        self._keys = [self._keys[i] for i in order]
+        self._payloads = [self._payloads[i] for i in order]
+        self.loaded = True
+
+    def add(self, material_id: str, title: str, tags: List[str], downloads: int = 0) -> None:
+        self._add(material_id, title, tags, downloads, keep_sorted=True)
+
+    def _prefix_matches(self, prefix: str):
+        start = bisect_left(self._keys, prefix)
+        for i in range(start, min(start + MAX_SCAN, len(self._keys))):
+            if not self._keys[i].startswith(prefix):
+                break
+            yield self._payloads[i]
+
+    def _corrections(self, word: str) -> List[str]:
+        """Known words whose prefix is within a small edit distance of `word`"""
+        limit = 1 if len(word) < 6 else 2
+        bucket = self._words.get(word[0], [])
+        # Words sharing the first two letters are scored first
+        start = bisect_left(bucket, word[:2])
+        order = chain(range(start, len(bucket)), range(start))
+        scored = []
+        for i in islice(order, MAX_FUZZY_SCAN):
+            known = bucket[i]
+            if len(known) < len(word) - limit:
+                continue
+            distance = bounded_distance(word, known[:len(word)], limit)
+            if distance:
+                scored.append((distance, known))
+        return [known for _, known in sorted(scored)[:3]]
+
+    def suggest(self, query: str, limit: int = 8, fuzzy: bool = False) -> List[dict]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        candidates = list(self._prefix_matches(prefix))
+        if fuzzy and len(candidates) < limit and len(prefix) >= 3:
+            # Only the word being typed is corrected
+            head, _, last = prefix.rpartition(" ")
+            for word in self._corrections(last):
+                corrected = f"{head} {word}".strip()
+                candidates.extend(self._prefix_matches(corrected))
+
+        ranked = {}
+        for kind, text, material_id, weight in candidates:
+            key = (kind, text if kind == "tag" else material_id)
+            if key in ranked:
+                continue
+            score = self._tag_counts.get(normalize(text), 0) if kind == "tag" else weight
+            ranked[key] = (score, {"text": text, "kind": kind, "material_id": material_id})
+
+        best = sorted(ranked.values(), key=lambda item: (-item[0], item[1]["text"]))
+        return [suggestion for _, suggestion in best[:limit]]
+
+
+suggest_index = SuggestIndex()
+
+
+async def rebuild_suggest_index(db: AsyncSession, index: SuggestIndex = suggest_index) -> None:
+    result = await db.execute(
+        select(Material.id, Material.title, Material.tags, Material.downloads)
+    )
+    index.build(result.all())
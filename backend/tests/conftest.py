@@ -2,6 +2,8 @@
 Pytest configuration and shared fixtures for backend tests
 """
 
+from contextlib import contextmanager
+
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
@@ -9,14 +11,39 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.pool import StaticPool
 
 from backend.main import app
-from backend.db import get_db, Base
+from backend.db import get_db, get_session_factory, Base
 from backend.db_models import User, Material # Ensure models are imported for metadata
 from backend.models import UserRole
+from backend.warmup import readiness
+from backend.querystats import QueryStats, current_query_stats
 
 import os
 # Use in-memory SQLite for tests by default, allow override via env
 TEST_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
 
+@pytest.fixture(autouse=True)
+def reset_runtime_state():
+    """Drop in-process state that would otherwise leak between tests"""
+    from backend.events import event_buffer
+    from backend.recommendations import related_index
+    from backend.suggest import suggest_index
+    from backend.catalog import materials_catalog
+    from backend.coalesce import read_coalescer
+    from backend.live import counter_broker
+    from backend.admission import admission
+    from backend.ratelimit import rate_limit_backend
+
+    event_buffer.clear()
+    related_index.clear()
+    suggest_index.clear()
+    materials_catalog.clear()
+    read_coalescer.clear()
+    counter_broker.clear()
+    admission.clear()
+    rate_limit_backend.clear()
+    yield
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_engine():
     """Create a fresh database engine for each test"""
@@ -55,6 +82,11 @@ async def client(db_session):
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: async_sessionmaker(
+        bind=db_session.bind, expire_on_commit=False
+    )
+    # ASGITransport skips the lifespan, so there is no warm-up to wait for
+    readiness.ready = True
     
     # Use AsyncClient for async endpoints
     transport = ASGITransport(app=app)
@@ -62,6 +94,33 @@ async def client(db_session):
         yield ac
     
     app.dependency_overrides.clear()
+    readiness.clear()
+
+
+@pytest.fixture
+def query_budget(db_session):
+    """Fail if the block issues more SQL statements, or fetches more rows, than allowed
+
+        with query_budget(statements=2, rows=1):
+            await client.get(...)
+    """
+    @contextmanager
+    def budget(statements: int, rows: int):
+        # The API shares the test session; start from an empty identity map like a real request
+        db_session.expunge_all()
+        stats = QueryStats(parent=current_query_stats.get())
+        token = current_query_stats.set(stats)
+        try:
+            yield stats
+        finally:
+            current_query_stats.reset(token)
+        queries = "\n".join(f"  {count}x {sql}" for sql, count in stats.statements.items())
+        assert stats.count <= statements, (
+            f"{stats.count} SQL statements, budget is {statements}:\n{queries}"
+        )
+        assert stats.rows <= rows, f"{stats.rows} rows fetched, budget is {rows}:\n{queries}"
+
+    return budget
 
 
 @pytest.fixture
@@ -164,3 +223,28 @@ def sample_material_data():
         "is_interactive": False,
         "tags": ["test", "automation", "sample"],
     }
+
+
+@pytest.fixture
+async def db_materials(db_session):
+    """Seed materials straight through the database layer"""
+    from backend.database import create_user, create_material
+    from backend.models import MaterialType, GradeLevel
+
+    author = await create_user(
+        db_session, "author@example.com", "password123", "Ms. Rivera", UserRole.educator
+    )
+    specs = [
+        ("Counting Apples", "Count the apples on every tree", MaterialType.worksheet, GradeLevel.kindergarten, ["math", "counting"]),
+        ("Letter Maze", "Find your way through the alphabet", MaterialType.puzzle, GradeLevel.kindergarten, ["alphabet", "puzzle"]),
+        ("Fraction Bars", "Compare fractions using colored bars", MaterialType.worksheet, GradeLevel.grade3, ["math", "fractions"]),
+    ]
+    materials = []
+    for title, description, material_type, grade_level, tags in specs:
+        materials.append(
+            await create_material(
+                db_session, author.id, author.name, title, description,
+                material_type, grade_level, False, tags,
+            )
+        )
+    return materials
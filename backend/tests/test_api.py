@@ -24,6 +24,26 @@ class TestHealthEndpoints:
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
 
+    async def test_health_waits_for_warmup(self, client, db_engine, db_materials):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from backend.coalesce import read_coalescer
+        from backend.recommendations import related_index
+        from backend.suggest import suggest_index
+        from backend.warmup import readiness, warm_up
+
+        readiness.clear()
+        response = await client.get("/health")
+        assert response.status_code == 503
+        assert (await client.get("/health/live")).status_code == 200
+
+        await warm_up(async_sessionmaker(bind=db_engine, expire_on_commit=False))
+        assert readiness.error is None
+        assert suggest_index.loaded
+        assert related_index.loaded
+        # Short-lived read cache entries would expire before traffic arrives
+        assert len(read_coalescer) == 0
+        assert (await client.get("/health")).status_code == 200
+
 
 class TestAuthEndpoints:
     """Test authentication endpoints"""
@@ -207,3 +227,501 @@ class TestUsersEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert data["email"] == "parent@example.com"
+
+
+class TestSparseFieldsets:
+    """Test column projection on the materials listing"""
+
+    async def test_card_projection(self, client, db_materials):
+        response = await client.get("/api/v1/materials?fields=card")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        item = data["items"][0]
+        assert set(item) == {
+            "id", "title", "thumbnail", "type", "grade_level",
+            "is_interactive", "downloads", "likes",
+        }
+
+    async def test_explicit_fields_with_filter(self, client, db_materials):
+        response = await client.get(
+            "/api/v1/materials?fields=title,grade_level&gradeLevel=kindergarten"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        for item in data["items"]:
+            assert set(item) == {"id", "title", "grade_level"}
+            assert item["grade_level"] == "kindergarten"
+
+    async def test_unknown_field_rejected(self, client, db_materials):
+        response = await client.get("/api/v1/materials?fields=title,hashed_password")
+        assert response.status_code == 400
+
+    async def test_default_returns_full_materials(self, client, db_materials):
+        response = await client.get("/api/v1/materials")
+        assert response.status_code == 200
+        assert "description" in response.json()["items"][0]
+
+
+class TestMaterialBatch:
+    """Test fetching several materials in one request"""
+
+    async def test_batch_preserves_order_and_reports_missing(self, client, db_materials):
+        ids = [db_materials[2].id, "missing-id", db_materials[0].id]
+        response = await client.get(f"/api/v1/materials/batch?ids={','.join(ids)}")
+        assert response.status_code == 200
+        data = response.json()
+        assert [m["id"] for m in data["items"]] == [db_materials[2].id, db_materials[0].id]
+        assert data["missing"] == ["missing-id"]
+
+    async def test_batch_post(self, client, db_materials):
+        ids = [m.id for m in reversed(db_materials)]
+        response = await client.post("/api/v1/materials/batch", json={"ids": ids})
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()["items"]] == ids
+
+    async def test_batch_size_capped(self, client):
+        ids = [f"id-{i}" for i in range(101)]
+        response = await client.post("/api/v1/materials/batch", json={"ids": ids})
+        assert response.status_code == 400
+
+
+class TestAnalyticsEndpoints:
+    """Test analytics served from event rollups"""
+
+    async def test_download_shows_up_after_rollup(self, client, db_session, db_materials, parent_headers):
+        from backend.jobs import run_jobs
+
+        material_id = db_materials[0].id
+        await client.post(f"/api/v1/materials/{material_id}/download")
+        await client.post(f"/api/v1/materials/{material_id}/like", headers=parent_headers)
+        await run_jobs(db_session, settle_seconds=0)
+
+        response = await client.get(f"/api/v1/analytics/materials/{material_id}?granularity=hour")
+        assert response.status_code == 200
+        buckets = response.json()["buckets"]
+        assert buckets[0]["downloads"] == 1
+        assert buckets[0]["likes"] == 1
+
+        response = await client.get("/api/v1/analytics/grades?gradeLevel=kindergarten")
+        assert response.status_code == 200
+        assert response.json()["grades"]["kindergarten"][0]["downloads"] == 1
+
+
+class TestTrendingEndpoint:
+    """Test the trending materials endpoint"""
+
+    async def test_trending_after_downloads(self, client, db_session, db_materials):
+        from backend.jobs import run_jobs
+
+        await client.post(f"/api/v1/materials/{db_materials[1].id}/download")
+        await run_jobs(db_session, settle_seconds=0)
+
+        response = await client.get("/api/v1/materials/trending?gradeLevel=kindergarten")
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [m["id"] for m in items] == [db_materials[1].id]
+        assert items[0]["trending_score"] > 0
+
+
+class TestRelatedEndpoint:
+    """Test the related materials endpoint"""
+
+    async def test_related_same_grade_only(self, client, db_session, db_materials):
+        from backend.database import create_material
+        from backend.models import MaterialType, GradeLevel
+        from backend.recommendations import rebuild_related_index
+
+        similar = await create_material(
+            db_session, db_materials[0].author_id, "Ms. Rivera", "Apple Counting Cards",
+            "Count apples and match the numbers", MaterialType.activity_book,
+            GradeLevel.kindergarten, False, ["math"],
+        )
+        await rebuild_related_index(db_session)
+        response = await client.get(f"/api/v1/materials/{db_materials[0].id}/related")
+        assert response.status_code == 200
+        items = response.json()["items"]
+        # Fraction Bars shares the "math" tag but is grade3
+        assert [m["id"] for m in items] == [similar.id]
+        assert items[0]["similarity"] > 0
+
+    async def test_related_unknown_material(self, client):
+        response = await client.get("/api/v1/materials/missing/related")
+        assert response.status_code == 404
+
+
+class TestAuthorDashboard:
+    """Test the current user's materials and stats"""
+
+    async def test_my_materials_and_stats(self, client, db_materials):
+        login = await client.post(
+            "/api/v1/auth/login",
+            json={"email": "author@example.com", "password": "password123"},
+        )
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        await client.post(f"/api/v1/materials/{db_materials[0].id}/download")
+
+        response = await client.get("/api/v1/users/me/materials", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["total"] == 3
+
+        response = await client.get("/api/v1/users/me/stats", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {"material_count": 3, "total_downloads": 1, "total_likes": 0}
+
+    async def test_stats_for_user_without_materials(self, client, parent_headers):
+        response = await client.get("/api/v1/users/me/stats", headers=parent_headers)
+        assert response.status_code == 200
+        assert response.json()["material_count"] == 0
+
+
+class TestMaterialSortEndpoint:
+    """Test the sort parameter on the listing"""
+
+    async def test_sort_by_title(self, client, db_materials):
+        response = await client.get("/api/v1/materials?sort=title&fields=card")
+        assert response.status_code == 200
+        titles = [m["title"] for m in response.json()["items"]]
+        assert titles == sorted(titles)
+
+    async def test_invalid_sort(self, client):
+        response = await client.get("/api/v1/materials?sort=random")
+        assert response.status_code == 422
+
+
+class TestMaterialFacetsEndpoint:
+    """Test facet counts on the listing"""
+
+    async def test_facets_with_page(self, client, db_materials):
+        response = await client.get(
+            "/api/v1/materials?facets=type,gradeLevel&type=worksheet&limit=1"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert len(data["items"]) == 1
+        assert data["facets"]["type"] == {"worksheet": 2, "puzzle": 1}
+        assert data["facets"]["gradeLevel"] == {"kindergarten": 1, "grade3": 1}
+
+    async def test_unknown_facet(self, client):
+        response = await client.get("/api/v1/materials?facets=author")
+        assert response.status_code == 400
+
+
+class TestSuggestEndpoint:
+    """Test autocomplete"""
+
+    async def test_suggest_builds_lazily(self, client, db_materials):
+        response = await client.get("/api/v1/materials/suggest?q=frac")
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert {"text": "Fraction Bars", "kind": "title", "material_id": db_materials[2].id} in items
+        assert {"text": "fractions", "kind": "tag", "material_id": None} in items
+
+
+class TestColumnarCatalogEndpoint:
+    """Test the listing served by the in-memory catalog"""
+
+    async def test_listing_and_counter_updates(self, client, db_materials, monkeypatch):
+        from backend.catalog import materials_catalog
+
+        monkeypatch.setattr(materials_catalog, "enabled", True)
+        response = await client.get("/api/v1/materials?gradeLevel=kindergarten&facets=type")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert data["facets"]["type"] == {"worksheet": 1, "puzzle": 1}
+        assert materials_catalog.loaded
+
+        await client.post(f"/api/v1/materials/{db_materials[2].id}/download")
+        response = await client.get("/api/v1/materials?sort=downloads&fields=card&limit=1")
+        item = response.json()["items"][0]
+        assert (item["id"], item["downloads"]) == (db_materials[2].id, 1)
+
+
+class TestReadCoalescing:
+    """Test single-flight reads through the API"""
+
+    async def test_identical_listings_run_once(self, client, db_materials):
+        import asyncio
+        from backend.coalesce import read_coalescer
+
+        responses = await asyncio.gather(*[
+            client.get("/api/v1/materials?gradeLevel=kindergarten") for _ in range(10)
+        ])
+        assert {r.json()["total"] for r in responses} == {2}
+        assert read_coalescer.stats["loads"] == 1
+
+    async def test_like_invalidates_cached_detail(self, client, db_materials, parent_headers):
+        material_id = db_materials[0].id
+        assert (await client.get(f"/api/v1/materials/{material_id}")).json()["likes"] == 0
+
+        await client.post(f"/api/v1/materials/{material_id}/like", headers=parent_headers)
+        assert (await client.get(f"/api/v1/materials/{material_id}")).json()["likes"] == 1
+
+
+class TestHomeEndpoint:
+    """Test the landing page aggregate"""
+
+    async def test_home_sections(self, client, db_materials, parent_headers):
+        response = await client.get("/api/v1/home?featuredLimit=2", headers=parent_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["stats"]["total_materials"] == 3
+        assert [m["id"] for m in data["featured"]] == [db_materials[2].id, db_materials[1].id]
+        assert data["user"]["email"] == "parent@example.com"
+
+    async def test_home_shares_cache_with_listing(self, client, db_materials):
+        from backend.coalesce import read_coalescer
+
+        data = (await client.get("/api/v1/home")).json()
+        assert data["user"] is None
+
+        loads = read_coalescer.stats["loads"]
+        await client.get("/api/v1/materials?limit=4")
+        await client.get("/api/v1/stats")
+        assert read_coalescer.stats["loads"] == loads
+
+
+class TestMaterialExport:
+    """Test the streaming catalog export"""
+
+    async def test_ndjson_export_with_filters(self, client, db_materials):
+        import json
+
+        response = await client.get("/api/v1/materials/export?gradeLevel=kindergarten&sort=title")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["title"] for r in rows] == ["Counting Apples", "Letter Maze"]
+        assert rows[0]["tags"] == ["math", "counting"]
+
+    async def test_csv_export(self, client, db_materials):
+        import csv
+        import io
+
+        response = await client.get("/api/v1/materials/export?format=csv&search=math")
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert {r["title"] for r in rows} == {"Counting Apples", "Fraction Bars"}
+        assert all(r["author_name"] == "Ms. Rivera" for r in rows)
+
+    async def test_csv_formats_every_datetime(self, monkeypatch):
+        from datetime import datetime
+        from backend.routers import materials
+
+        monkeypatch.setattr(materials, "EXPORT_FIELDS", ("id", "created_at", "updated_at"))
+        moment = datetime(2026, 1, 2, 3, 4, 5)
+        row = {"id": "m1", "created_at": moment, "updated_at": moment}
+        assert materials.encode_csv([row]) == "m1,2026-01-02T03:04:05,2026-01-02T03:04:05\r\n"
+
+
+class TestMaterialChangesEndpoint:
+    """Test delta sync"""
+
+    async def test_sync_round_trip(self, client, db_materials):
+        data = (await client.get("/api/v1/materials/changes")).json()
+        assert len(data["items"]) == 3
+        assert data["deleted"] == [] and not data["has_more"]
+
+        await client.post(f"/api/v1/materials/{db_materials[2].id}/download")
+        response = await client.get(f"/api/v1/materials/changes?since={data['next_token']}")
+        items = response.json()["items"]
+        assert [(m["id"], m["downloads"]) for m in items] == [(db_materials[2].id, 1)]
+
+    async def test_invalid_token(self, client):
+        response = await client.get("/api/v1/materials/changes?since=yesterday")
+        assert response.status_code == 400
+
+
+async def open_event_stream(material_id: str):
+    """Start GET /materials/{id}/events; returns (body chunk queue, disconnect event, app task)
+
+    httpx's ASGITransport buffers whole bodies, so the endless stream is driven directly.
+    """
+    import asyncio
+
+    path = f"/api/v1/materials/{material_id}/events"
+    chunks: asyncio.Queue = asyncio.Queue()
+    disconnected = asyncio.Event()
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            await chunks.put(message["body"].decode())
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 50000), "server": ("test", 80),
+    }
+    return chunks, disconnected, asyncio.create_task(app(scope, receive, send))
+
+
+def parse_counters(chunk: str) -> dict:
+    import json
+
+    event, data = chunk.strip().split("\n")
+    assert event == "event: counters"
+    return json.loads(data.removeprefix("data: "))
+
+
+class TestMaterialEventStream:
+    """Test the live counter stream"""
+
+    async def test_unknown_material(self, client):
+        response = await client.get("/api/v1/materials/nonexistent/events")
+        assert response.status_code == 404
+
+    async def test_download_pushes_counters(self, client, db_materials, monkeypatch):
+        import asyncio
+        from backend.live import counter_broker
+
+        monkeypatch.setattr(counter_broker, "interval", 0.01)
+        material_id = db_materials[0].id
+        chunks, disconnected, stream = await open_event_stream(material_id)
+
+        snapshot = parse_counters(await asyncio.wait_for(chunks.get(), 5))
+        assert (snapshot["downloads"], snapshot["likes"]) == (0, 0)
+
+        await client.post(f"/api/v1/materials/{material_id}/download")
+        update = parse_counters(await asyncio.wait_for(chunks.get(), 5))
+        assert update == {"id": material_id, "downloads": 1, "likes": 0}
+
+        disconnected.set()
+        await asyncio.wait_for(stream, 5)
+        assert counter_broker.subscriber_count(material_id) == 0
+
+    async def test_open_streams_hold_no_connection(self, client, db_materials, tmp_path):
+        import asyncio
+        from sqlalchemy import insert, text
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        from backend.db import Base, get_db, get_session_factory
+        from backend.db_models import Material as MaterialRow
+
+        # A real queue pool with one connection per stream and no overflow
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=3, max_overflow=0, pool_timeout=1
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            columns = MaterialRow.__table__.columns.keys()
+            await conn.execute(insert(MaterialRow), [{c: getattr(db_materials[0], c) for c in columns}])
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        app.dependency_overrides[get_session_factory] = lambda: session_factory
+
+        async def pooled_get_db():
+            async with session_factory() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = pooled_get_db
+
+        streams = [await open_event_stream(db_materials[0].id) for _ in range(3)]
+        for chunks, _, _ in streams:
+            await asyncio.wait_for(chunks.get(), 5)
+        assert engine.pool.checkedout() == 0
+        # Every connection is still free for other requests
+        async with session_factory() as db:
+            assert await db.scalar(text("SELECT 1")) == 1
+
+        for _, disconnected, stream in streams:
+            disconnected.set()
+            await asyncio.wait_for(stream, 5)
+        await engine.dispose()
+
+
+class TestAdmissionControl:
+    """Test load shedding"""
+
+    async def test_saturated_class_is_shed(self, client, db_materials):
+        from backend.admission import admission, Limiter
+
+        admission.limiters["read"] = Limiter(limit=0, max_queue=0)
+        response = await client.get("/api/v1/materials")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+        # Other classes and health checks are unaffected
+        assert (await client.get("/health")).status_code == 200
+        metrics = (await client.get("/metrics/admission")).json()
+        assert metrics["read"]["shed"] == 1
+        assert metrics["write"]["shed"] == 0
+
+
+class TestRateLimiting:
+    """Test per-endpoint token buckets"""
+
+    async def test_login_is_limited_per_ip(self, client, monkeypatch):
+        from backend import ratelimit
+
+        monkeypatch.setitem(ratelimit.LIMITS, "login", ratelimit.RateLimit(2, 60))
+        credentials = {"email": "nobody@example.com", "password": "wrong"}
+        for _ in range(2):
+            response = await client.post("/api/v1/auth/login", json=credentials)
+            assert response.status_code == 401
+
+        response = await client.post("/api/v1/auth/login", json=credentials)
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+        # Downloads have a separate budget
+        response = await client.post("/api/v1/materials/nonexistent/download")
+        assert response.status_code == 404
+
+    async def test_like_is_limited_per_ip_across_accounts(
+        self, client, db_materials, parent_headers, educator_headers, monkeypatch
+    ):
+        from backend import ratelimit
+
+        monkeypatch.setitem(ratelimit.LIMITS, "like", ratelimit.RateLimit(1, 60))
+        url = f"/api/v1/materials/{db_materials[0].id}/like"
+        assert (await client.post(url, headers=parent_headers)).status_code == 200
+        # A fresh account from the same client still hits the per-IP bucket
+        assert (await client.post(url, headers=educator_headers)).status_code == 429
+
+
+class TestMetrics:
+    """Test the Prometheus endpoint"""
+
+    async def test_latency_by_route_template(self, client, db_materials):
+        await client.get(f"/api/v1/materials/{db_materials[0].id}")
+        await client.get(f"/api/v1/materials/{db_materials[1].id}")
+
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        # Keyed by the route template, not the concrete path
+        assert (
+            'kidlearn_http_request_duration_seconds_count{method="GET",'
+            'route="/materials/{material_id}",status="200"}'
+        ) in body
+        assert db_materials[0].id not in body
+        assert "kidlearn_read_cache_requests_total" in body
+        assert 'kidlearn_admission_shed_total{route_class="auth"} 0.0' in body
+
+
+class TestQueryStats:
+    """Test per-request SQL instrumentation"""
+
+    async def test_server_timing_and_repeat_warning(self, client, db_materials, caplog, monkeypatch):
+        from backend import querystats
+
+        response = await client.post(f"/api/v1/materials/{db_materials[0].id}/download")
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        assert timing.startswith("db;dur=")
+        assert int(timing.split('desc="')[1].split(" ")[0]) > 0
+
+        monkeypatch.setattr(querystats, "QUERY_REPEAT_WARN", 0)
+        with caplog.at_level("WARNING", logger="backend.querystats"):
+            await client.post(f"/api/v1/materials/{db_materials[0].id}/download")
+        assert "Possible N+1: POST" in caplog.text
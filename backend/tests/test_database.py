@@ -150,3 +150,693 @@ class TestStatsOperations:
         assert stats["total_materials"] == 1
         assert stats["total_downloads"] == 2
         assert stats["grade_breakdown"]["grade1"] == 1
+
+
+class TestMaterialEvents:
+    """Test the event log, rollups and retention"""
+
+    async def test_rollup_and_prune(self, db_session, db_materials):
+        from datetime import datetime, timedelta
+        from sqlalchemy import select, func
+        from backend.db_models import MaterialEvent
+        from backend.models import MaterialEventType, RollupGranularity
+        from backend.events import (
+            MaterialEventBuffer, rollup_events, prune_events,
+            get_material_activity, get_grade_activity,
+        )
+        from backend.trending import refresh_trending_scores
+
+        material = db_materials[0]
+        buffer = MaterialEventBuffer(batch_size=10)
+        for _ in range(3):
+            buffer.record(material.id, material.grade_level, MaterialEventType.download)
+        buffer.record(material.id, material.grade_level, MaterialEventType.like)
+        assert await buffer.flush(db_session) == 4
+
+        # Too recent: a smaller id could still be committed after these
+        assert await rollup_events(db_session) == 0
+        assert await rollup_events(db_session, settle_seconds=0) == 4
+        # Nothing new past the watermark
+        assert await rollup_events(db_session, settle_seconds=0) == 0
+
+        since = datetime.utcnow() - timedelta(days=1)
+        buckets = await get_material_activity(db_session, material.id, RollupGranularity.hour, since)
+        assert len(buckets) == 1
+        assert buckets[0]["downloads"] == 3
+        assert buckets[0]["likes"] == 1
+
+        grades = await get_grade_activity(db_session, RollupGranularity.day, since)
+        assert grades["kindergarten"][0]["downloads"] == 3
+
+        # Retention only removes events every consumer has processed
+        assert await prune_events(db_session, retention_days=0) == 0
+        await refresh_trending_scores(db_session, settle_seconds=0)
+        assert await prune_events(db_session, retention_days=0) == 4
+        remaining = await db_session.scalar(select(func.count(MaterialEvent.id)))
+        assert remaining == 0
+
+    async def test_rollup_waits_for_late_commits(self, db_session, db_materials):
+        from datetime import datetime, timedelta
+        from sqlalchemy import insert
+        from backend.db_models import MaterialEvent
+        from backend.events import rollup_events
+
+        material = db_materials[0]
+        now = datetime.utcnow()
+        event = {"material_id": material.id, "grade_level": material.grade_level, "event_type": "download"}
+        # id 1 is settled; id 3 is too recent, so id 2 (committed after it) is not skipped
+        await db_session.execute(insert(MaterialEvent), [
+            {**event, "id": 1, "created_at": now - timedelta(minutes=5)},
+            {**event, "id": 3, "created_at": now},
+        ])
+        await db_session.commit()
+        assert await rollup_events(db_session) == 1
+
+        await db_session.execute(insert(MaterialEvent), [{**event, "id": 2, "created_at": now}])
+        await db_session.commit()
+        assert await rollup_events(db_session, settle_seconds=0) == 2
+
+    async def test_periodic_flush(self, db_session, db_materials):
+        import asyncio
+        from sqlalchemy import select, func
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from backend.db_models import MaterialEvent
+        from backend.models import MaterialEventType
+        from backend.events import MaterialEventBuffer, flush_events_periodically
+
+        material = db_materials[0]
+        buffer = MaterialEventBuffer(batch_size=100, flush_seconds=0.01)
+        buffer.record(material.id, material.grade_level, MaterialEventType.download)
+        task = asyncio.create_task(flush_events_periodically(async_sessionmaker(bind=db_session.bind), buffer))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+        assert len(buffer) == 0
+        assert await db_session.scalar(select(func.count(MaterialEvent.id))) == 1
+
+    async def test_full_batch_wakes_flusher(self, db_session, db_materials):
+        import asyncio
+        from sqlalchemy import select, func
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from backend.db_models import MaterialEvent
+        from backend.models import MaterialEventType
+        from backend.events import MaterialEventBuffer, flush_events_periodically
+
+        material = db_materials[0]
+        buffer = MaterialEventBuffer(batch_size=2, flush_seconds=60)
+        task = asyncio.create_task(flush_events_periodically(async_sessionmaker(bind=db_session.bind), buffer))
+        buffer.record(material.id, material.grade_level, MaterialEventType.download)
+        await asyncio.sleep(0.05)
+        assert len(buffer) == 1
+
+        buffer.record(material.id, material.grade_level, MaterialEventType.like)
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        assert len(buffer) == 0
+        assert await db_session.scalar(select(func.count(MaterialEvent.id))) == 2
+
+
+class TestTrending:
+    """Test incrementally maintained trending scores"""
+
+    async def test_recent_activity_ranks_higher(self, db_session, db_materials):
+        from datetime import datetime, timedelta
+        from sqlalchemy import insert
+        from backend.db_models import MaterialEvent
+        from backend.models import GradeLevel
+        from backend.trending import refresh_trending_scores, get_trending_materials
+
+        old, recent, other_grade = db_materials[0], db_materials[1], db_materials[2]
+        now = datetime.utcnow()
+        rows = [
+            # Many old downloads vs. a few fresh ones
+            *[{"material_id": old.id, "created_at": now - timedelta(days=30)} for _ in range(10)],
+            *[{"material_id": recent.id, "created_at": now} for _ in range(3)],
+            {"material_id": other_grade.id, "created_at": now},
+        ]
+        await db_session.execute(insert(MaterialEvent), [
+            {**row, "grade_level": "kindergarten" if row["material_id"] != other_grade.id else "grade3",
+             "event_type": "download"}
+            for row in rows
+        ])
+        await db_session.commit()
+
+        # The 30-day-old events are settled; the fresh ones wait for late commits
+        assert await refresh_trending_scores(db_session) == 10
+        assert await refresh_trending_scores(db_session, settle_seconds=0) == 4
+        assert await refresh_trending_scores(db_session, settle_seconds=0) == 0
+
+        trending = await get_trending_materials(db_session, grade_level=GradeLevel.kindergarten)
+        assert [m.id for m, _ in trending] == [recent.id, old.id]
+        assert trending[0][1] == pytest.approx(3.0, rel=1e-3)
+
+
+class TestRelatedMaterials:
+    """Test the similarity index and its incremental updates"""
+
+    async def test_build_and_incremental_add(self, db_session, db_materials):
+        from backend.models import MaterialType, GradeLevel
+        from backend.recommendations import (
+            SimilarityIndex, rebuild_related_index, add_related_material, get_related_materials,
+        )
+
+        index = SimilarityIndex(top_k=2)
+        assert await rebuild_related_index(db_session, index) == 3
+
+        counting, maze, fractions = db_materials
+        # Nothing in common with the other kindergarten material, and
+        # fractions (shared "math" tag) is in a different grade
+        assert index.neighbors[counting.id] == []
+        assert index.neighbors[fractions.id] == []
+
+        new = await create_material(
+            db_session, counting.author_id, "Ms. Rivera", "Counting Bears",
+            "Count the bears and color them", MaterialType.worksheet,
+            GradeLevel.kindergarten, False, ["math", "counting"],
+        )
+        await add_related_material(db_session, new, index)
+
+        related = await get_related_materials(db_session, new.id)
+        assert [m.id for m, _ in related] == [counting.id]
+        # The existing list picked up the new material
+        related = await get_related_materials(db_session, counting.id)
+        assert [m.id for m, _ in related] == [new.id]
+        assert index.neighbors[maze.id] == []
+
+        index.remove(new.id)
+        assert new.id not in index.neighbors
+        assert index.neighbors[counting.id] == []
+
+    async def test_requests_queue_until_loaded(self, db_session, db_materials):
+        from backend.models import MaterialType, GradeLevel
+        from backend.recommendations import (
+            SimilarityIndex, rebuild_related_index, load_related_index, add_related_material,
+            get_related_materials,
+        )
+
+        assert await rebuild_related_index(db_session, SimilarityIndex(top_k=2)) == 3
+        counting = db_materials[0]
+        index = SimilarityIndex(top_k=2)
+        new = await create_material(
+            db_session, counting.author_id, "Ms. Rivera", "Counting Bears",
+            "Count the bears and color them", MaterialType.worksheet,
+            GradeLevel.kindergarten, False, ["math", "counting"],
+        )
+        # Not loaded: nothing is built in the request, the row waits
+        await add_related_material(db_session, new, index)
+        assert not index.loaded
+        assert [row[0] for row in index.pending] == [new.id]
+        assert await get_related_materials(db_session, new.id) == []
+
+        # The load reads stored lists and folds the queued row in
+        assert await load_related_index(db_session, index) == 4
+        assert index.pending == []
+        related = await get_related_materials(db_session, counting.id)
+        assert [m.id for m, _ in related] == [new.id]
+
+
+class TestAuthorStats:
+    """Test per-author aggregates"""
+
+    async def test_stats_follow_writes(self, db_session, db_materials):
+        from backend.database import get_author_stats, get_author_materials, rebuild_author_stats
+
+        author_id = db_materials[0].author_id
+        await increment_downloads(db_session, db_materials[0].id)
+        await increment_downloads(db_session, db_materials[1].id)
+        await increment_likes(db_session, db_materials[2].id)
+
+        stats = await get_author_stats(db_session, author_id)
+        assert (stats.material_count, stats.total_downloads, stats.total_likes) == (3, 2, 1)
+
+        # A full recompute agrees with the incremental totals
+        await rebuild_author_stats(db_session)
+        db_session.expunge_all()
+        stats = await get_author_stats(db_session, author_id)
+        assert (stats.material_count, stats.total_downloads, stats.total_likes) == (3, 2, 1)
+
+        materials, total = await get_author_materials(db_session, author_id, limit=2)
+        assert total == 3
+        assert [m.title for m in materials] == ["Fraction Bars", "Letter Maze"]
+
+    async def test_first_material_creates_the_row(self, db_session):
+        from backend.database import get_author_stats
+
+        author = await create_user(db_session, "new@example.com", "password123", "New Author", UserRole.educator)
+        for title in ("First Sheet", "Second Sheet"):
+            await create_material(
+                db_session, author.id, author.name, title, "Practice", MaterialType.worksheet,
+                GradeLevel.grade1, False, [],
+            )
+
+        # Both bumps went through the upsert: one insert, then one increment
+        db_session.expunge_all()
+        stats = await get_author_stats(db_session, author.id)
+        assert (stats.material_count, stats.total_downloads, stats.total_likes) == (2, 0, 0)
+
+
+class TestMaterialSorting:
+    """Test sort modes and tie-breaking"""
+
+    async def test_sort_modes(self, db_session, db_materials):
+        from backend.models import MaterialSort
+
+        counting, maze, fractions = db_materials
+        await increment_downloads(db_session, maze.id)
+        await increment_likes(db_session, fractions.id)
+
+        materials, _ = await get_materials(db_session, sort=MaterialSort.downloads)
+        assert materials[0].id == maze.id
+
+        materials, _ = await get_materials(db_session, sort=MaterialSort.likes)
+        assert materials[0].id == fractions.id
+        # Ties on likes fall back to id, descending
+        assert [m.id for m in materials[1:]] == sorted([counting.id, maze.id], reverse=True)
+
+        materials, _ = await get_materials(db_session, sort=MaterialSort.title)
+        assert [m.title for m in materials] == ["Counting Apples", "Fraction Bars", "Letter Maze"]
+
+        materials, _ = await get_materials(db_session, sort=MaterialSort.newest)
+        assert materials[0].id == fractions.id
+
+
+class TestMaterialFacets:
+    """Test facet counts from the grouped query"""
+
+    async def test_disjunctive_facets(self, db_session, db_materials):
+        from backend.database import get_material_facets
+
+        total, facets = await get_material_facets(db_session)
+        assert total == 3
+        assert facets["type"] == {"worksheet": 2, "puzzle": 1}
+        assert facets["gradeLevel"] == {"kindergarten": 2, "grade3": 1}
+
+        # Type counts keep the grade filter, grade counts keep the type filter
+        total, facets = await get_material_facets(
+            db_session, material_type=MaterialType.worksheet, grade_level=GradeLevel.kindergarten
+        )
+        assert total == 1
+        assert facets["type"] == {"worksheet": 1, "puzzle": 1}
+        assert facets["gradeLevel"] == {"kindergarten": 1, "grade3": 1}
+
+        total, facets = await get_material_facets(db_session, search="fraction")
+        assert total == 1
+        assert facets["gradeLevel"] == {"grade3": 1}
+
+
+class TestSuggestIndex:
+    """Test the in-memory autocomplete index"""
+
+    def _index(self):
+        from backend.suggest import SuggestIndex
+
+        index = SuggestIndex()
+        index.build([
+            ("1", "Counting Apples", ["math", "counting"], 10),
+            ("2", "Apple Orchard Coloring", ["art"], 50),
+            ("3", "Letter Maze", ["alphabet", "Math"], 0),
+        ])
+        return index
+
+    async def test_prefix_matches_any_title_word(self):
+        index = self._index()
+        results = index.suggest("app")
+        # Ranked by downloads
+        assert [r["material_id"] for r in results] == ["2", "1"]
+
+    async def test_tags_ranked_by_usage_and_case_insensitive(self):
+        index = self._index()
+        results = index.suggest("MA")
+        assert results[0] == {"text": "math", "kind": "tag", "material_id": None}
+        assert [r["text"] for r in results[1:]] == ["Letter Maze"]
+
+    async def test_incremental_add_and_fuzzy(self):
+        index = self._index()
+        index.add("4", "Dinosaur Dot-to-Dot", ["dinosaurs"])
+        assert "4" in [r["material_id"] for r in index.suggest("dino")]
+
+        assert index.suggest("dinasaur") == []
+        fuzzy = index.suggest("dinasaur", fuzzy=True)
+        assert {r["text"] for r in fuzzy} == {"Dinosaur Dot-to-Dot", "dinosaurs"}
+
+    async def test_fuzzy_scores_a_capped_bucket(self, monkeypatch):
+        import backend.suggest as suggest
+
+        index = self._index()
+        for i in range(suggest.MAX_FUZZY_SCAN * 2):
+            index.add(str(10 + i), f"Dot Sheet dw{i:04d}", [])
+        index.add("9", "Dinosaur Dot-to-Dot", [])
+        scored = []
+        distance = suggest.bounded_distance
+        monkeypatch.setattr(suggest, "bounded_distance", lambda a, b, limit: scored.append(b) or distance(a, b, limit))
+
+        fuzzy = index.suggest("dinasaur", fuzzy=True)
+        assert [r["text"] for r in fuzzy] == ["Dinosaur Dot-to-Dot"]
+        # Only "d" words are scored, at most MAX_FUZZY_SCAN of them
+        assert len(scored) <= suggest.MAX_FUZZY_SCAN
+        assert all(word.startswith("d") for word in scored)
+
+
+class TestColumnarCatalog:
+    """The in-memory engine must answer exactly like the SQL path"""
+
+    async def test_matches_sql(self, db_session, db_materials):
+        from backend.models import MaterialSort
+        from backend.database import get_material_facets
+        from backend.catalog import ColumnarCatalog, load_catalog, material_row
+
+        catalog = ColumnarCatalog(enabled=True)
+        await load_catalog(db_session, catalog)
+        await increment_downloads(db_session, db_materials[1].id)
+        catalog.set_counter(db_materials[1].id, "downloads", 1)
+
+        new = await create_material(
+            db_session, db_materials[0].author_id, "Ms. Rivera", "Apple Math Game",
+            "Count apples to win", MaterialType.game, GradeLevel.kindergarten, True, ["Math"],
+        )
+        catalog.add(material_row(new))
+
+        cases = [
+            {},
+            {"material_type": MaterialType.worksheet},
+            {"grade_level": GradeLevel.kindergarten, "sort": MaterialSort.downloads},
+            {"search": "math", "sort": MaterialSort.title},
+            {"search": "APPLE", "sort": MaterialSort.likes, "limit": 1, "offset": 1},
+        ]
+        for case in cases:
+            expected, expected_total = await get_materials(db_session, **case)
+            items, total = catalog.query(**case)
+            assert [row["id"] for row in items] == [m.id for m in expected], case
+            assert total == expected_total
+
+        filters = {"material_type": MaterialType.worksheet, "search": "a"}
+        assert catalog.facets(**filters) == await get_material_facets(db_session, **filters)
+
+
+class TestReadCoalescer:
+    """Concurrent identical reads share one load"""
+
+    async def test_concurrent_reads_share_one_load(self):
+        import asyncio
+        from backend.coalesce import ReadCoalescer
+
+        coalescer = ReadCoalescer(ttl=60)
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "page"
+
+        results = await asyncio.gather(*[coalescer.get(("k",), load) for _ in range(20)])
+        assert results == ["page"] * 20
+        assert len(calls) == 1
+        assert coalescer.stats["coalesced"] == 19
+
+        # Served from the cache until invalidated
+        assert await coalescer.get(("k",), load) == "page"
+        coalescer.invalidate_namespace("k")
+        await coalescer.get(("k",), load)
+        assert len(calls) == 2
+
+    async def test_expired_entry_is_refreshed_once(self):
+        import asyncio
+        from backend.coalesce import ReadCoalescer
+
+        coalescer = ReadCoalescer(ttl=0.01, stale_seconds=60)
+        versions = iter(["v1", "v2", "v3"])
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return next(versions)
+
+        assert await coalescer.get(("k",), load) == "v1"
+        await asyncio.sleep(0.02)
+        # One request refreshes; the rest get the previous value meanwhile
+        results = await asyncio.gather(*[coalescer.get(("k",), load) for _ in range(5)])
+        assert sorted(results) == ["v1"] * 4 + ["v2"]
+        assert coalescer.stats["loads"] == 2
+
+    async def test_errors_reach_every_waiter_and_are_not_cached(self):
+        import asyncio
+        from backend.coalesce import ReadCoalescer
+
+        coalescer = ReadCoalescer(ttl=60)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("database down")
+
+        results = await asyncio.gather(
+            *[coalescer.get(("k",), failing) for _ in range(3)], return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(coalescer) == 0
+
+
+class TestMaterialStreaming:
+    """Export rows come in bounded batches"""
+
+    async def test_batches(self, db_session, db_materials):
+        from backend.database import stream_material_rows
+
+        batches = [rows async for rows in stream_material_rows(db_session, batch_size=2)]
+        assert [len(rows) for rows in batches] == [2, 1]
+        assert {r["id"] for rows in batches for r in rows} == {m.id for m in db_materials}
+
+
+class TestMaterialChanges:
+    """Every write moves a material past the sync cursor"""
+
+    async def test_cursor_sees_updates_and_deletes(self, db_session, db_materials):
+        from backend.database import get_material_changes, delete_material
+
+        changed, deleted, cursor, has_more = await get_material_changes(db_session, limit=2)
+        assert [m.id for m in changed] == [m.id for m in db_materials[:2]]
+        assert has_more
+
+        changed, _, cursor, has_more = await get_material_changes(db_session, cursor)
+        assert [m.id for m in changed] == [db_materials[2].id]
+        assert not has_more
+
+        before = db_materials[0].updated_at
+        await increment_likes(db_session, db_materials[0].id)
+        assert await delete_material(db_session, db_materials[1].id)
+
+        changed, deleted, cursor, _ = await get_material_changes(db_session, cursor)
+        assert [m.id for m in changed] == [db_materials[0].id]
+        assert changed[0].updated_at >= before
+        assert deleted == [db_materials[1].id]
+        assert await get_material_changes(db_session, cursor) == ([], [], cursor, False)
+
+    async def test_horizon_holds_back_recent_changes(self, db_session, db_materials):
+        from datetime import timedelta
+        from backend.database import get_material_changes, next_change_seq
+
+        # Sequence numbers keep increasing without a shared counter row
+        first = await next_change_seq(db_session)
+        assert await next_change_seq(db_session) == first + 1
+
+        old, recent = db_materials[0], db_materials[1]
+        old.updated_at -= timedelta(minutes=1)
+        await db_session.commit()
+        # Everything from the first change inside the window on waits, even
+        # older-looking rows behind it, so the cursor never skips a late commit
+        changed, _, cursor, has_more = await get_material_changes(db_session, settle_seconds=30)
+        assert [m.id for m in changed] == [old.id]
+        assert not has_more
+
+        changed, _, _, _ = await get_material_changes(db_session, cursor, settle_seconds=0)
+        assert [m.id for m in changed] == [recent.id, db_materials[2].id]
+
+
+class TestCounterBroker:
+    """Counter updates are coalesced per material and fanned out"""
+
+    async def test_publish_coalesces_until_flush(self, db_session, db_materials):
+        from backend.live import CounterBroker, counter_broker
+
+        broker = CounterBroker(interval=60)
+        first, second = broker.subscribe("m1"), broker.subscribe("m1")
+        broker.publish("m1", downloads=1, likes=0)
+        broker.publish("m1", downloads=2, likes=1)
+        broker.publish("m2", downloads=9, likes=9)  # no subscribers
+
+        assert broker.flush() == 2
+        assert broker.flush() == 0
+        message = first.get_nowait()
+        assert message == second.get_nowait()
+        assert message.startswith("event: counters\n")
+        assert '"downloads": 2, "likes": 1' in message
+
+        broker.unsubscribe("m1", first)
+        broker.unsubscribe("m1", second)
+        assert broker.subscriber_count() == 0
+
+        # increment_* publish to the shared broker
+        queue = counter_broker.subscribe(db_materials[0].id)
+        await increment_downloads(db_session, db_materials[0].id)
+        counter_broker.flush()
+        assert '"downloads": 1' in queue.get_nowait()
+        counter_broker.unsubscribe(db_materials[0].id, queue)
+
+    async def test_slow_subscriber_keeps_only_the_latest(self):
+        import json
+        from backend.live import CounterBroker
+
+        # Flushed by hand; the background flusher never fires
+        broker = CounterBroker(interval=3600)
+        slow = broker.subscribe("m1")
+        fast = broker.subscribe("m1")
+
+        fast_seen = []
+        for downloads, likes in ((1, 0), (2, 0), (3, 1)):
+            broker.publish("m1", downloads, likes)
+            assert broker.flush() == 2
+            fast_seen.append(json.loads(fast.get_nowait().split("data: ")[1]))
+
+        assert [m["downloads"] for m in fast_seen] == [1, 2, 3]
+        assert slow.qsize() == 1
+        assert json.loads(slow.get_nowait().split("data: ")[1]) == {"id": "m1", "downloads": 3, "likes": 1}
+
+        broker.unsubscribe("m1", slow)
+        broker.unsubscribe("m1", fast)
+        assert broker.subscriber_count() == 0
+        broker.clear()
+
+
+class TestInvalidationBus:
+    """Writes evict the affected keys on every replica"""
+
+    async def test_replicas_sharing_a_hub(self):
+        from backend.invalidation import InvalidationBus, PostgresInvalidationBus
+
+        hub, seen = [], []
+        writer = InvalidationBus(hub, [lambda m, local: seen.append(("writer", m, local))])
+        InvalidationBus(hub, [lambda m, local: seen.append(("reader", m, local))])
+
+        writer.publish_local(["created m1"])
+        assert seen == [("writer", "created m1", True), ("reader", "created m1", False)]
+
+        # A replica ignores its own NOTIFY; it applied the messages after commit
+        pg = PostgresInvalidationBus(handlers=[lambda m, local: seen.append(("pg", m, local))])
+        pg.on_notification(None, 0, "kidlearn_invalidate", f"{pg.origin}\ncreated m1")
+        pg.on_notification(None, 0, "kidlearn_invalidate", "other\ndeleted m1\ncreated m2")
+        assert seen[2:] == [("pg", "deleted m1", False), ("pg", "created m2", False)]
+
+    async def test_writes_evict_cached_reads(self, db_session, db_materials, monkeypatch):
+        import asyncio
+        from backend.coalesce import read_coalescer
+        from backend.invalidation import apply_invalidation
+        from backend.recommendations import related_index
+
+        async def load():
+            return "cached"
+
+        material_id = db_materials[0].id
+        await read_coalescer.get(("materials.detail", material_id), load)
+        await read_coalescer.get(("materials.list", None), load)
+        await read_coalescer.get(("stats",), load)
+
+        await increment_downloads(db_session, material_id)
+        assert len(read_coalescer) == 1  # listings keep their short TTL
+
+        scheduled = []
+
+        async def fetch(material_id):
+            scheduled.append(material_id)
+
+        monkeypatch.setattr("backend.invalidation.add_created_material", fetch)
+        related_index.build([])
+        apply_invalidation("created m9", local=False)
+        await asyncio.sleep(0)
+        assert len(read_coalescer) == 0
+        assert scheduled == ["m9"]
+        assert related_index.loaded
+
+    async def test_remote_create_adds_only_the_new_row(self, db_session, db_materials):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from backend.catalog import materials_catalog, material_row
+        from backend.invalidation import add_created_material, apply_invalidation
+        from backend.recommendations import related_index
+        from backend.suggest import suggest_index
+
+        new = db_materials[0]
+        others = db_materials[1:]
+        materials_catalog.load([material_row(m) for m in others])
+        suggest_index.build([(m.id, m.title, m.tags, m.downloads) for m in others])
+
+        await add_created_material(new.id, async_sessionmaker(bind=db_session.bind))
+        assert materials_catalog.loaded and len(materials_catalog) == 3
+        assert suggest_index.loaded
+        assert any(s["material_id"] == new.id for s in suggest_index.suggest(new.title))
+
+        # Fetched before the index was loaded: queued for the load to fold in
+        assert related_index.pending[0][0] == new.id
+
+        apply_invalidation(f"deleted {new.id}", local=False)
+        assert not materials_catalog.loaded
+        assert related_index.pending == []
+
+
+class TestAdmissionLimiter:
+    """Bounded concurrency with a bounded, deadline-limited queue"""
+
+    async def test_queue_then_shed(self):
+        import asyncio
+        from backend.admission import Limiter
+
+        limiter = Limiter(limit=1, max_queue=1, timeout=1)
+        assert await limiter.acquire()
+
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        assert not await limiter.acquire()  # queue full
+
+        limiter.release()
+        assert await queued
+        assert limiter.in_flight == 1
+
+        impatient = Limiter(limit=1, max_queue=5, timeout=0.01)
+        assert await impatient.acquire()
+        assert not await impatient.acquire()  # deadline passed
+        assert impatient.snapshot()["shed"] == 1
+        assert impatient.queue_depth == 0
+
+
+class TestRateLimitBackends:
+    """Token buckets refill lazily and are shared through the database"""
+
+    async def test_bucket_empties_then_refills(self, db_session):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from backend.ratelimit import MemoryBackend, DatabaseBackend, RateLimit
+
+        session_factory = async_sessionmaker(bind=db_session.bind, expire_on_commit=False)
+        limit = RateLimit(capacity=2, period=60)
+        for backend in (MemoryBackend(), DatabaseBackend()):
+            assert await backend.take("login:1.2.3.4", limit, session_factory) == 0
+            assert await backend.take("login:1.2.3.4", limit, session_factory) == 0
+            wait = await backend.take("login:1.2.3.4", limit, session_factory)
+            assert 0 < wait <= 30
+            # Other keys have their own bucket
+            assert await backend.take("login:5.6.7.8", limit, session_factory) == 0
+
+        memory = MemoryBackend()
+        await memory.take("like:user:1", limit, session_factory)
+        memory.sweep(now=1e12)
+        assert len(memory) == 0
+
+
+class TestQueryFingerprints:
+    """Statements differing only in values share a fingerprint"""
+
+    async def test_literals_and_in_lists_are_normalized(self):
+        from backend.querystats import fingerprint, normalize_statement
+
+        a = "SELECT * FROM materials WHERE id IN (?, ?, ?) AND downloads > 10 AND title = 'a'"
+        b = "SELECT *  FROM materials\nWHERE id IN ($1, $2) AND downloads > 7 AND title = :title"
+        assert fingerprint(a) == fingerprint(b)
+        assert normalize_statement(a) == "SELECT * FROM materials WHERE id IN (?+) AND downloads > ? AND title = ?"
+        assert fingerprint("SELECT 1 FROM users") != fingerprint("SELECT 1 FROM materials")
@@ -0,0 +1,144 @@
+"""
+Query budgets: the most SQL statements and fetched rows each endpoint may use
+
+Budgets are for a cold request (empty caches and indexes) against the
+`db_materials` seed. Raising one should be a deliberate part of a change,
+not a side effect of an extra refresh or a lazy load.
+"""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+async def author_headers(client, db_materials):
+    """Login as the seeded author (Ms. Rivera)"""
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": "author@example.com", "password": "password123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class TestAuthBudgets:
+    async def test_register(self, client, query_budget):
+        with query_budget(statements=3, rows=1):
+            response = await client.post(
+                "/api/v1/auth/register",
+                json={"email": "new@example.com", "password": "password123", "name": "New", "role": "parent"},
+            )
+        assert response.status_code == 201
+
+    async def test_login(self, client, db_materials, query_budget):
+        with query_budget(statements=1, rows=1):
+            response = await client.post(
+                "/api/v1/auth/login",
+                json={"email": "author@example.com", "password": "password123"},
+            )
+        assert response.status_code == 200
+
+    async def test_logout(self, client, author_headers, query_budget):
+        with query_budget(statements=1, rows=1):
+            response = await client.post("/api/v1/auth/logout", headers=author_headers)
+        assert response.status_code == 200
+
+
+class TestUsersBudgets:
+    async def test_me(self, client, author_headers, query_budget):
+        with query_budget(statements=1, rows=1):
+            response = await client.get("/api/v1/users/me", headers=author_headers)
+        assert response.status_code == 200
+
+    async def test_my_materials(self, client, author_headers, query_budget):
+        with query_budget(statements=3, rows=5):
+            response = await client.get("/api/v1/users/me/materials", headers=author_headers)
+        assert response.status_code == 200
+
+    async def test_my_stats(self, client, author_headers, query_budget):
+        with query_budget(statements=2, rows=2):
+            response = await client.get("/api/v1/users/me/stats", headers=author_headers)
+        assert response.status_code == 200
+
+
+class TestStatsBudgets:
+    async def test_stats(self, client, db_materials, query_budget):
+        with query_budget(statements=4, rows=5):
+            response = await client.get("/api/v1/stats")
+        assert response.status_code == 200
+
+
+class TestMaterialsBudgets:
+    async def test_list(self, client, db_materials, query_budget):
+        with query_budget(statements=2, rows=3):
+            response = await client.get("/api/v1/materials?type=worksheet&limit=2")
+        assert response.status_code == 200
+
+    async def test_list_with_facets(self, client, db_materials, query_budget):
+        with query_budget(statements=2, rows=6):
+            response = await client.get("/api/v1/materials?facets=type,gradeLevel&fields=id,title")
+        assert response.status_code == 200
+
+    async def test_suggest(self, client, db_materials, query_budget):
+        with query_budget(statements=1, rows=3):
+            response = await client.get("/api/v1/materials/suggest?q=frac")
+        assert response.status_code == 200
+
+    async def test_trending(self, client, db_materials, query_budget):
+        with query_budget(statements=2, rows=0):
+            response = await client.get("/api/v1/materials/trending")
+        assert response.status_code == 200
+
+    async def test_batch_get(self, client, db_materials, query_budget):
+        ids = ",".join(m.id for m in db_materials)
+        with query_budget(statements=1, rows=3):
+            response = await client.get(f"/api/v1/materials/batch?ids={ids}")
+        assert response.status_code == 200
+
+    async def test_batch_post(self, client, db_materials, query_budget):
+        with query_budget(statements=1, rows=3):
+            response = await client.post("/api/v1/materials/batch", json={"ids": [m.id for m in db_materials]})
+        assert response.status_code == 200
+
+    async def test_changes(self, client, db_materials, query_budget):
+        with query_budget(statements=2, rows=3):
+            response = await client.get("/api/v1/materials/changes")
+        assert response.status_code == 200
+
+    async def test_export(self, client, db_materials, query_budget):
+        # Streamed through a server-side cursor, whose rows are not counted
+        with query_budget(statements=1, rows=0):
+            response = await client.get("/api/v1/materials/export?format=csv")
+        assert response.status_code == 200
+
+    async def test_detail(self, client, db_materials, query_budget):
+        with query_budget(statements=1, rows=1):
+            response = await client.get(f"/api/v1/materials/{db_materials[0].id}")
+        assert response.status_code == 200
+
+    async def test_related(self, client, db_materials, query_budget):
+        with query_budget(statements=2, rows=1):
+            response = await client.get(f"/api/v1/materials/{db_materials[0].id}/related")
+        assert response.status_code == 200
+
+    async def test_create(self, client, author_headers, sample_material_data, query_budget):
+        form = {**sample_material_data, "tags": json.dumps(sample_material_data["tags"])}
+        with query_budget(statements=6, rows=3):
+            response = await client.post("/api/v1/materials", headers=author_headers, data=form)
+        assert response.status_code == 201
+
+    async def test_events_unknown_material(self, client, query_budget):
+        # The stream itself never ends; its only query is the existence check
+        with query_budget(statements=1, rows=0):
+            response = await client.get("/api/v1/materials/nonexistent/events")
+        assert response.status_code == 404
+
+    async def test_download(self, client, db_materials, query_budget):
+        with query_budget(statements=6, rows=3):
+            response = await client.post(f"/api/v1/materials/{db_materials[0].id}/download")
+        assert response.status_code == 200
+
+    async def test_like(self, client, db_materials, parent_headers, query_budget):
+        with query_budget(statements=8, rows=5):
+            response = await client.post(f"/api/v1/materials/{db_materials[0].id}/like", headers=parent_headers)
+        assert response.status_code == 200
@@ -0,0 +1,129 @@
+"""
+Trending materials for KidLearn API
+
+Every download/like adds exp(LAMBDA * (t - epoch)) to the material's
+`trending_score`. Because all scores share the same epoch, sorting by the
+stored value gives the same order as sorting by the score decayed to "now",
+so nothing has to be rewritten as time passes:
+
+- refresh only touches materials that received events since the last run
+- reads are a top-k walk of the (grade_level, trending_score) index
+
+The stored numbers grow over time, so once they approach float range the
+epoch is moved forward and all scores are rescaled in one pass (rare).
+"""
+
+import math
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import GradeLevel, MaterialEventType
+from .db_models import Material, MaterialEvent
+from .database import get_job_watermark, set_job_watermark
+from .events import EVENT_SETTLE_SECONDS, TRENDING_JOB, settled_horizon
+
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "72"))
+DECAY_RATE = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600)  # per second
+
+# A like says more about a material than a download
+EVENT_WEIGHTS = {
+    MaterialEventType.download.value: 1.0,
+    MaterialEventType.like.value: 3.0,
+}
+
+EPOCH_JOB = "trending_epoch"
+DEFAULT_EPOCH = datetime(2024, 1, 1)
+# Rebase well before exp() overflows (~709)
+MAX_EXPONENT = 600.0
+
+
+def _seconds(moment: datetime) -> int:
+    return int((moment - datetime(1970, 1, 1)).total_seconds())
+
+
+async def get_epoch(db: AsyncSession) -> int:
+    return await get_job_watermark(db, EPOCH_JOB) or _seconds(DEFAULT_EPOCH)
+
+
+def decayed(score: float, epoch: int, now: Optional[datetime] = None) -> float:
+    """Convert a stored score into its value at `now`"""
+    elapsed = _seconds(now or datetime.utcnow()) - epoch
+    return score * math.exp(-DECAY_RATE * elapsed)
+
+
+async def _rebase(db: AsyncSession, epoch: int, new_epoch: int) -> None:
+    factor = math.exp(-DECAY_RATE * (new_epoch - epoch))
+    await db.execute(update(Material).values(trending_score=Material.trending_score * factor))
+    await set_job_watermark(db, EPOCH_JOB, new_epoch)
+
+
+async def refresh_trending_scores(
+    db: AsyncSession, batch_size: int = 10000, settle_seconds: float = EVENT_SETTLE_SECONDS
+) -> int:
+    """Fold settled events past the trending watermark into material scores.
+
+    Returns the number of events consumed; call until it returns 0.
+    """
+    watermark = await get_job_watermark(db, TRENDING_JOB)
+    horizon = await settled_horizon(db, watermark, settle_seconds)
+    if horizon <= watermark:
+        return 0
+    result = await db.execute(
+        select(MaterialEvent.id, MaterialEvent.material_id, MaterialEvent.event_type, MaterialEvent.created_at)
+        .where(MaterialEvent.id > watermark, MaterialEvent.id <= horizon)
+        .order_by(MaterialEvent.id)
+        .limit(batch_size)
+    )
+    events = result.all()
+    if not events:
+        return 0
+
+    epoch = await get_epoch(db)
+    newest = _seconds(events[-1][3])
+    if DECAY_RATE * (newest - epoch) > MAX_EXPONENT:
+        await _rebase(db, epoch, newest)
+        epoch = newest
+
+    deltas = defaultdict(float)
+    for _, material_id, event_type, created_at in events:
+        weight = EVENT_WEIGHTS.get(event_type, 1.0)
+        deltas[material_id] += weight * math.exp(DECAY_RATE * (_seconds(created_at) - epoch))
+
+    # One executemany UPDATE for all touched materials
+    stmt = (
+        update(Material.__table__)
+        .where(Material.__table__.c.id == bindparam("material_id"))
+        .values(trending_score=Material.__table__.c.trending_score + bindparam("delta"))
+    )
+    await db.execute(stmt, [
+        {"material_id": material_id, "delta": delta}
+        for material_id, delta in deltas.items()
+    ])
+
+    await set_job_watermark(db, TRENDING_JOB, events[-1][0])
+    await db.commit()
+    return len(events)
+
+
+async def get_trending_materials(
+    db: AsyncSession,
+    grade_level: Optional[GradeLevel] = None,
+    limit: int = 10,
+) -> List[Tuple[Material, float]]:
+    """Top-k materials by current trending score"""
+    # Select the score as its own column: the refresh job updates it with Core
+    # statements, so Material instances already in the session may be stale
+    query = select(Material, Material.trending_score).where(Material.trending_score > 0)
+    if grade_level:
+        query = query.where(Material.grade_level == grade_level.value)
+    query = query.order_by(Material.trending_score.desc(), Material.id).limit(limit)
+
+    rows = (await db.execute(query)).all()
+    epoch = await get_epoch(db)
+    now = datetime.utcnow()
+    return [(m, decayed(score, epoch, now)) for m, score in rows]
@@ -0,0 +1,92 @@
+"""
+Startup warm-up for KidLearn API
+
+After a deploy or a scale-out, the first requests would otherwise pay for
+opening database connections, compiling queries, importing lazily and
+building in-memory indexes. `warm_up` does all of that once, in the
+background, before the instance reports ready:
+
+- opens and pings WARMUP_CONNECTIONS pooled connections
+- builds the autocomplete index (and the columnar catalog when enabled)
+- loads the related-materials index that new submissions are folded into
+- runs the platform stats query and the first catalog page overall and per
+  grade level once, so their statements are compiled and their pages are
+  in the database cache. The results are not put in the read cache: its
+  entries live for seconds and would expire before traffic arrives.
+
+`/health` answers 503 until it has finished (readiness); `/health/live`
+answers as soon as the process serves requests (liveness).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .models import GradeLevel, MaterialSort
+from .suggest import rebuild_suggest_index
+from .catalog import materials_catalog, load_catalog
+from .recommendations import load_related_index
+from .routers.materials import load_material_list
+from .routers.stats import load_platform_stats
+
+logger = logging.getLogger(__name__)
+
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "5"))
+# Page size the frontend catalog requests (the listing default)
+WARMUP_PAGE_SIZE = 50
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def clear(self) -> None:
+        self.__init__()
+
+
+readiness = Readiness()
+
+
+async def ping_pool(session_factory: async_sessionmaker, connections: int = WARMUP_CONNECTIONS) -> None:
+    """Open `connections` connections at once so they all land in the pool"""
+    engine = session_factory.kw["bind"]
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*[ping() for _ in range(connections)])
+
+
+async def warm_caches(session_factory: async_sessionmaker) -> None:
+    async with session_factory() as db:
+        await rebuild_suggest_index(db)
+        if materials_catalog.enabled:
+            await load_catalog(db)
+        await load_related_index(db)
+
+        await load_platform_stats(db)
+        for grade_level in [None, *GradeLevel]:
+            filters = dict(material_type=None, grade_level=grade_level, search=None)
+            await load_material_list(db, None, [], filters, WARMUP_PAGE_SIZE, 0, MaterialSort.newest)
+
+
+async def warm_up(session_factory: async_sessionmaker, state: Readiness = readiness) -> None:
+    started = time.perf_counter()
+    try:
+        await ping_pool(session_factory)
+        await warm_caches(session_factory)
+    except Exception as exc:
+        # Everything warmed here also fills lazily, so serve traffic anyway
+        logger.exception("Warm-up failed")
+        state.error = str(exc)
+    state.seconds = round(time.perf_counter() - started, 3)
+    state.ready = True
+    logger.info("Warm-up finished in %.3fs", state.seconds)
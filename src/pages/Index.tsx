@@ -34,9 +34,9 @@ export default function Index() {
   useEffect(() => {
     const loadData = async () => {
       try {
-        const [materialsRes, statsRes] = await Promise.all([api.getMaterials({ limit: 4 }), api.getStats()]);
-        setFeaturedMaterials(materialsRes.items);
-        setStats({ materials: statsRes.totalMaterials, downloads: statsRes.totalDownloads });
+        const home = await api.getHome(4);
+        setFeaturedMaterials(home.featured);
+        setStats({ materials: home.stats.totalMaterials, downloads: home.stats.totalDownloads });
       } catch (error) {
         console.error('Failed to load data:', error);
       }
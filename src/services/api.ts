@@ -73,6 +73,12 @@ export interface StatsResponse {
   gradeBreakdown: Record<string, number>;
 }
 
+export interface HomeResponse {
+  stats: StatsResponse;
+  featured: Material[];
+  user: User | null;
+}
+
 /**
  * Transform backend response (snake_case) to frontend format (camelCase)
  */
@@ -243,10 +249,7 @@ export async function likeMaterial(id: string): Promise<number> {
 // Stats API
 // =============================================================================
 
-export async function getStats(): Promise<StatsResponse> {
-  const response = await apiClient.get('/stats');
-  const data = response.data;
-
+function transformStats(data: any): StatsResponse {
   return {
     totalMaterials: data.total_materials,
     totalDownloads: data.total_downloads,
@@ -254,3 +257,23 @@ export async function getStats(): Promise<StatsResponse> {
     gradeBreakdown: data.grade_breakdown,
   };
 }
+
+export async function getStats(): Promise<StatsResponse> {
+  const response = await apiClient.get('/stats');
+  return transformStats(response.data);
+}
+
+// =============================================================================
+// Home API
+// =============================================================================
+
+export async function getHome(featuredLimit = 4): Promise<HomeResponse> {
+  const response = await apiClient.get('/home', { params: { featuredLimit } });
+  const data = response.data;
+
+  return {
+    stats: transformStats(data.stats),
+    featured: data.featured.map(transformMaterial),
+    user: data.user ? transformUser(data.user) : null,
+  };
+}